@@ -0,0 +1,73 @@
+import logging
+from typing import Optional, Dict, Any
+
+from core.image import Image
+from core.utils.stopwatch import Stopwatch
+
+from .services.face import FaceDetection
+from .services.mask import MaskClassifier
+from .services.output import AbstractDetectionWriter, to_record
+from .services.video import VideoRecognitionTracker, DETECT_ACTION, TRACK_ACTION
+
+LOG = logging.getLogger(__name__)
+
+
+class FaceMaskBatchRecognition:
+    ''' Headless recognition over a finite video source, the detections of
+        every frame are written to a detection writer.
+    '''
+
+    def __init__(self, video_source, writer: AbstractDetectionWriter, first_frame: int = 0):
+        self.video_source = video_source
+        self.writer = writer
+        self.first_frame = first_frame
+        self.frame_count = 0
+        self.stopwatch = Stopwatch()
+        self.video_recognition = VideoRecognitionTracker(
+            FaceDetection(), MaskClassifier(), asynchronous=False)
+
+    def run(self, max_frames: Optional[int] = None) -> Dict[str, Any]:
+        while max_frames is None or self.frame_count < max_frames:
+            with self.stopwatch.measure("read"):
+                frame = self.video_source.read_frame()
+            if frame is None:
+                break
+            self._process_frame(frame)
+            self._write_frame()
+            self.frame_count += 1
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        wall_time = self.stopwatch.elapsed
+        return {
+            "frames": self.frame_count,
+            "wall_time_s": wall_time,
+            "fps": self.frame_count / wall_time if wall_time else 0.0,
+            "stages": self.stopwatch.report(),
+        }
+
+    def _process_frame(self, frame: Image):
+        with self.stopwatch.measure("scheduling"):
+            action = self.video_recognition.next_action(frame)
+        if action == DETECT_ACTION:
+            with self.stopwatch.measure("detection"):
+                detected_objects = self.video_recognition.detect(frame)
+            with self.stopwatch.measure("classification"):
+                self.video_recognition.classify(detected_objects)
+        elif action == TRACK_ACTION:
+            with self.stopwatch.measure("tracking"):
+                self.video_recognition.update_trackers(frame)
+
+    def _write_frame(self):
+        frame_index = self.first_frame + self.frame_count
+        with self.stopwatch.measure("output"):
+            self.writer.write(
+                to_record(frame_index, obj) for obj in self.video_recognition.detected_objects)
+
+
+def log_report(report: Dict[str, Any]):
+    LOG.info("processed %d frames in %.2fs (%.2f FPS)",
+             report["frames"], report["wall_time_s"], report["fps"])
+    for stage, stats in report["stages"].items():
+        LOG.info("stage %-10s count=%d total=%.2fs mean=%.2fms",
+                 stage, stats["count"], stats["total_s"], stats["mean_ms"])
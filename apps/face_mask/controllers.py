@@ -1,42 +1,57 @@
 import logging
 from simple_settings import settings
 
-from core.video import VideoStreamer
+from core.video import VideoStreamer, ThreadedVideoStreamer
 from core.image import Image
+from core.startup import STARTUP, log_startup_report
 
 from .services.face import FaceDetection
 from .services.mask import MaskClassifier
 from .services.video import VideoRecognitionTracker
+from .services.warmup import warm_up
 
 from .views import FaceMaskRecognitionWindow
 
 LOG = logging.getLogger(__name__)
 VIDEO_SOURCE = settings.VIDEO_SOURCE
-SKIP_FRAME = settings.SKIP_FRAME
+VIDEO_THREADED = settings.VIDEO_THREADED
+MODEL_WARMUP = settings.MODEL_WARMUP
 
 
 class FaceMaskRecognition:
 
-    SKIP_FRAME = SKIP_FRAME
     VIDEO_SOURCE = VIDEO_SOURCE
+    VIDEO_THREADED = VIDEO_THREADED
+    MODEL_WARMUP = MODEL_WARMUP
 
     def __init__(self):
         self._init_recognition()
         self.window = FaceMaskRecognitionWindow()
-        self.video_source = VideoStreamer(source=self.VIDEO_SOURCE)
+        streamer_class = ThreadedVideoStreamer if self.VIDEO_THREADED else VideoStreamer
+        with STARTUP.measure("video_source"):
+            self.video_source = streamer_class(source=self.VIDEO_SOURCE)
+        self._is_started = False
 
     def _init_recognition(self):
         detection_model = FaceDetection()
         classification_model = MaskClassifier()
         self.video_recognition = VideoRecognitionTracker(
             detection_model, classification_model)
+        # the models are loaded by the first frame without the warm-up
+        self._warm_up = warm_up(detection_model, classification_model) if self.MODEL_WARMUP else None
 
     def open_window(self):
-        self.window.open()
+        with STARTUP.measure("window"):
+            self.window.open()
         frame = self.video_source.read_frame()
-        self.window.resize(*frame.size)
+        if frame is not None:
+            self.window.resize(*frame.size)
         self._live_stream()
 
+    def close(self):
+        self.video_source.stop()
+        self.video_recognition.shutdown()
+
     def _live_stream(self):
         try:
             self._update_frame()
@@ -47,14 +62,22 @@ class FaceMaskRecognition:
 
     def _update_frame(self):
         frame = self.video_source.read_frame()
-        self._process_frame(frame)
+        if frame is None:
+            return
+        # the frames are shown without recognition until the models are warm
+        if self._models_ready:
+            self._process_frame(frame)
+            if not self._is_started:
+                self._is_started = True
+                log_startup_report()
         self.window.render(frame, self.detected_objects)
 
+    @property
+    def _models_ready(self) -> bool:
+        return self._warm_up is None or not self._warm_up.is_alive()
+
     def _process_frame(self, frame: Image):
-        if self.video_source.frame_count % self.SKIP_FRAME == 0:
-            self.video_recognition.recognize(frame)
-        else:
-            self.video_recognition.update_trackers(frame)
+        self.video_recognition.process(frame)
 
     @property
     def detected_objects(self):
@@ -1,12 +1,15 @@
-from typing import Union
+from typing import Optional, Sequence
+
+import numpy as np
 
 from core.computer_vision.tracking import CentroidTraker
 from core.image import ROIImage
-from core.utils.functional import rgetattr
 
 
 class DetectedObject:
 
+    __slots__ = ('roi_image', 'centroid_traker', 'tracker', 'classification', 'tracking_confidence')
+
     def __init__(self, roi_image: ROIImage,
                  centroid_traker: CentroidTraker = None,
                  tracker=None, classification=None):
@@ -14,13 +17,15 @@ class DetectedObject:
         self.centroid_traker = centroid_traker
         self.tracker = tracker
         self.classification = classification
+        # score of the last correlation tracker update
+        self.tracking_confidence = None
 
     @property
-    def id(self) -> Union[id, None]:
-        return rgetattr(self, 'centroid_traker.id')
+    def id(self) -> Optional[int]:
+        return self.centroid_traker.id if self.centroid_traker is not None else None
 
     def __str__(self):
-        id_label = rgetattr(self, 'id', '')
+        id_label = '' if self.id is None else str(self.id)
         if self.classification:
             confidence_percentage = f"{self.classification.prediction * 100:.2f}%"
             return f"{self.classification.label} {id_label} - {confidence_percentage}"
@@ -32,3 +37,8 @@ class DetectedObject:
 
     def __ne__(self, other: "DetectedObject"):
         return not self == other
+
+
+def object_boxes(detected_objects: Sequence[DetectedObject]) -> np.ndarray:
+    ''' (N, 4) array of the object coordinates, for the centroid matching and the classification '''
+    return np.array([obj.roi_image.coordinates for obj in detected_objects], dtype="int").reshape(-1, 4)
@@ -0,0 +1,110 @@
+import time
+import logging
+from itertools import islice
+from typing import List, Tuple, Optional
+
+from simple_settings import settings
+
+from core.video import ThreadedVideoStreamer
+from core.image import Image
+
+from .services.face import FaceDetection
+from .services.mask import MaskClassifier
+from .services.output import AbstractDetectionWriter, to_record
+from .services.video import VideoRecognitionTracker, VideoRecognition, DETECT_ACTION, TRACK_ACTION
+
+LOG = logging.getLogger(__name__)
+VIDEO_SOURCES = settings.VIDEO_SOURCES
+IDLE_WAIT = 0.005
+
+
+class CameraStream:
+    ''' Video source along with its own tracking state '''
+
+    def __init__(self, source, video_recognition: VideoRecognitionTracker,
+                 writer: Optional[AbstractDetectionWriter] = None):
+        self.source = source
+        # do not wait for the frames, a camera without a new frame is skipped
+        self.video_source = ThreadedVideoStreamer(source=source, read_timeout=0)
+        self.video_recognition = video_recognition
+        self.writer = writer
+        self.frame_count = 0
+
+    def write(self):
+        if self.writer:
+            self.writer.write(
+                to_record(self.frame_count, obj) for obj in self.video_recognition.detected_objects)
+
+    def stop(self):
+        self.video_source.stop()
+
+
+class MultiStreamRecognition:
+    ''' Serves many video sources with a single detector and classifier,
+        the detection frames of all the cameras are recognized in the same forward passes.
+    '''
+
+    def __init__(self, sources: List = VIDEO_SOURCES,
+                 writers: Optional[List[AbstractDetectionWriter]] = None):
+        self.detection_model = FaceDetection()
+        self.classification_model = MaskClassifier()
+        writers = writers or [None] * len(sources)
+        self.streams = [
+            CameraStream(
+                source,
+                VideoRecognitionTracker(self.detection_model, self.classification_model, asynchronous=False),
+                writer)
+            for source, writer in zip(sources, writers)
+        ]
+        self._is_running = False
+
+    def run(self):
+        self._is_running = True
+        LOG.info("serving %d video sources", len(self.streams))
+        try:
+            while self._is_running:
+                if not self.process():
+                    time.sleep(IDLE_WAIT)
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._is_running = False
+        for stream in self.streams:
+            stream.stop()
+
+    def process(self) -> int:
+        ''' Processes the latest frame of every camera, returns the quantity of processed frames '''
+        frames = [(stream, stream.video_source.latest_frame()) for stream in self.streams]
+        frames = [(stream, frame) for stream, frame in frames if frame is not None]
+        actions = [stream.video_recognition.next_action(frame) for stream, frame in frames]
+        self._recognize([frames[i] for i, action in enumerate(actions) if action == DETECT_ACTION])
+        for (stream, frame), action in zip(frames, actions):
+            if action == TRACK_ACTION:
+                stream.video_recognition.update_trackers(frame)
+        for stream, _ in frames:
+            stream.write()
+            stream.frame_count += 1
+        return len(frames)
+
+    def _recognize(self, frames: List[Tuple[CameraStream, Image]]):
+        if not frames:
+            return
+        regions = [stream.video_recognition.detection_region for stream, _ in frames]
+        roi_image_lists = self.detection_model.bulk_detect(
+            frame.crop(region) if region else frame for (_, frame), region in zip(frames, regions))
+        object_lists = [
+            VideoRecognition.to_detected_objects(frame, roi_images, region)
+            for (_, frame), roi_images, region in zip(frames, roi_image_lists, regions)
+        ]
+        for (stream, frame), objects, region in zip(frames, object_lists, regions):
+            stream.video_recognition.set_detected_objects(frame, objects, region)
+        # only the objects without a cached classification are classified, the regions
+        # of all the frames are cropped into the same classifier batches
+        uncached = [stream.video_recognition.uncached_objects(objects)
+                    for (stream, _), objects in zip(frames, object_lists)]
+        classifications = iter(self.classification_model.classify_frames_regions(
+            (frame, boxes) for (_, frame), (_, boxes) in zip(frames, uncached)))
+        for (stream, _), (uncached_objects, _) in zip(frames, uncached):
+            stream.video_recognition.set_classifications(
+                uncached_objects, islice(classifications, len(uncached_objects)))
@@ -1,12 +1,12 @@
 from simple_settings import settings
 
 from core.computer_vision.recognition.detection import CV2DetectionModel
-from core.utils.model_loader import ModelLoader
+from core.utils.model_loader import ModelLoader, LazyModel
 
 
 class FaceDetection(CV2DetectionModel):
 
-    MODEL = ModelLoader().from_cafe(*settings.FACE_DETECTOR_MODEL_CAFFE)
+    MODEL = LazyModel(lambda: ModelLoader().from_cafe(*settings.FACE_DETECTOR_MODEL_CAFFE))
     IMAGE_SIZE = (300, 300)
     MEAN = settings.MEAN
     COLOR_SPACE = 'BGR'
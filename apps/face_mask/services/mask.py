@@ -1,17 +1,43 @@
+from typing import Optional
+
 from simple_settings import settings
 
-from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+import numpy as np
+
+from core.computer_vision.recognition.backends import (
+    KERAS_BACKEND, OPENCV_BACKEND, ONNXRUNTIME_BACKEND, TFLITE_BACKEND)
+from core.computer_vision.recognition.classification import InferenceClassificationModel
+from core.utils.model_loader import ModelLoader, LazyModel
+
+MODEL_PATHS = {
+    KERAS_BACKEND: settings.MASK_DETECTOR_MODEL,
+    OPENCV_BACKEND: settings.MASK_DETECTOR_MODEL_ONNX,
+    ONNXRUNTIME_BACKEND: settings.MASK_DETECTOR_MODEL_ONNX,
+    TFLITE_BACKEND: settings.MASK_DETECTOR_MODEL_TFLITE,
+}
+
+
+def model_path(backend: str, quantization: Optional[str] = None) -> str:
+    if quantization is None:
+        return MODEL_PATHS[backend]
+    if backend != TFLITE_BACKEND:
+        raise ValueError(f"The quantized models run with the {TFLITE_BACKEND} backend, not {backend}")
+    return settings.MASK_DETECTOR_MODEL_QUANTIZED.format(quantization)
+
 
-from core.computer_vision.recognition.classification.keras import KerasClassificationModel
-from core.utils.model_loader import ModelLoader
-from core.image import Image
+def preprocess_input(arr_img: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    ''' MobileNetV2 scaling to [-1, 1], same as its keras preprocess_input '''
+    out = np.multiply(arr_img, 1 / 127.5, out=out)
+    out -= 1.0
+    return out
 
 
-class MaskClassifier(KerasClassificationModel):
+class MaskClassifier(InferenceClassificationModel):
 
-    MODEL = ModelLoader().from_keras(settings.MASK_DETECTOR_MODEL)
+    BACKEND = LazyModel(lambda: ModelLoader().from_backend(
+        settings.CLASSIFICATION_BACKEND,
+        model_path(settings.CLASSIFICATION_BACKEND, settings.CLASSIFICATION_QUANTIZATION)))
     CLASES = ['MASK', 'NO_MASK']
 
-    def _transform_image(self, image: Image):
-        arr_img = super()._transform_image(image)
-        return preprocess_input(arr_img)
+    def _preprocess(self, arr_img: np.ndarray):
+        preprocess_input(arr_img, out=arr_img)
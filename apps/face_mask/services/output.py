@@ -0,0 +1,84 @@
+from typing import Dict, Any, Iterable, List, Type
+from abc import ABC, abstractmethod
+import csv
+import json
+
+from ..models import DetectedObject
+
+Record = Dict[str, Any]
+
+
+def to_record(frame_index: int, detected_object: DetectedObject) -> Record:
+    classification = detected_object.classification
+    return {
+        "frame": frame_index,
+        "id": detected_object.id,
+        "label": classification.label if classification else None,
+        "prediction": float(classification.prediction) if classification else None,
+        "coordinates": [int(coord) for coord in detected_object.roi_image.coordinates],
+    }
+
+
+class AbstractDetectionWriter(ABC):
+
+    @abstractmethod
+    def write(self, records: Iterable[Record]):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AbstractFileDetectionWriter(AbstractDetectionWriter):
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf8")
+
+    def close(self):
+        self._file.close()
+
+
+class JSONLinesDetectionWriter(AbstractFileDetectionWriter):
+
+    def write(self, records: Iterable[Record]):
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+
+
+class CSVDetectionWriter(AbstractFileDetectionWriter):
+
+    FIELDS = ["frame", "id", "label", "prediction", "start_x", "start_y", "end_x", "end_y"]
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+        self._writer.writeheader()
+
+    def write(self, records: Iterable[Record]):
+        for record in records:
+            row = {key: value for key, value in record.items() if key != "coordinates"}
+            row.update(zip(self.FIELDS[-4:], record["coordinates"]))
+            self._writer.writerow(row)
+
+
+class CollectionDetectionWriter(AbstractDetectionWriter):
+    ''' Keeps the records in memory '''
+
+    def __init__(self):
+        self.records: List[Record] = []
+
+    def write(self, records: Iterable[Record]):
+        self.records.extend(records)
+
+
+WRITERS: Dict[str, Type[AbstractFileDetectionWriter]] = {
+    "jsonl": JSONLinesDetectionWriter,
+    "csv": CSVDetectionWriter,
+}
@@ -1,29 +1,197 @@
-from typing import List, Iterable
+import math
+import logging
+import functools
+from typing import List, Iterable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
+
 import dlib
+import numpy as np
+from simple_settings import settings
 
 from core.computer_vision.recognition.detection import AbstractDetectionModel
 from core.computer_vision.recognition.classification import AbstractClasificationModel
+from core.computer_vision.recognition.classification.abstract import Classification
+from core.computer_vision.recognition.classification.cache import ClassificationCache
 from core.computer_vision.tracking import CentroidManager
 from core.computer_vision.video import AbstractVideoRecognition, AbstractVideoTrakingManager
-from core.image import Image, img_to_array
+from core.computer_vision.scheduling import AbstractDetectionScheduler, create_scheduler
+from core.computer_vision.motion import MotionDetector, MotionGate
+from core.image import Image, ROICoordinates, img_to_array
+from core.metrics import METRICS
+
+from ..models import ROIImage, DetectedObject, object_boxes
+
+LOG = logging.getLogger(__name__)
 
-from ..models import ROIImage, DetectedObject
+SKIP_ACTION = 'skip'
+TRACK_ACTION = 'track'
+DETECT_ACTION = 'detect'
+
+
+@functools.lru_cache(maxsize=None)
+def tracker_executor(workers: int) -> ThreadPoolExecutor:
+    ''' Thread pool shared by the traking managers with the same worker quantity '''
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tracker")
 
 
 class VideoRecognitionTracker(AbstractVideoRecognition, AbstractVideoTrakingManager):
+    ''' The scheduler decides the frames where the detection runs. With the motion gate,
+        the frames without motion are skipped and the detection is restricted to the motion area,
+        the objects tracked out of it are kept.
+        The detected objects get their traker IDs before being classified, so the
+        classifications of the already tracked objects can be reused from the cache.
+        When asynchronous, the detection and classification run in a background worker
+        while the trackers keep being updated, the results are reconciled when they arrive.
+        The worker only runs the models, the objects and the classification cache are
+        only read and changed by the thread updating the trackers.
+    '''
 
-    def __init__(self, detection_model: AbstractDetectionModel, classifier_model: AbstractClasificationModel):
-        self.video_recognition = VideoRecognition(detection_model, classifier_model)
+    def __init__(self, detection_model: AbstractDetectionModel, classifier_model: AbstractClasificationModel,
+                 asynchronous: bool = settings.ASYNC_RECOGNITION,
+                 scheduler: AbstractDetectionScheduler = None,
+                 classification_cache: bool = settings.CLASSIFICATION_CACHE,
+                 motion_gate: bool = settings.MOTION_GATE):
+        self.video_recognition = VideoRecognition(
+            detection_model, classifier_model,
+            ClassificationCache() if classification_cache else None)
         self.video_traking_manager = VideoTrakingManager()
+        motion_detector = MotionDetector()
+        self.motion_gate = MotionGate(motion_detector) if motion_gate else None
+        self.scheduler = scheduler or create_scheduler(motion_detector=motion_detector)
+        self._executor = ThreadPoolExecutor(max_workers=1) if asynchronous else None
+        self._pending_detection: Optional[Tuple[Image, Optional[ROICoordinates], Future]] = None
+        self._pending_classification: Optional[Tuple[List[DetectedObject], Future]] = None
+
+    def process(self, frame: Image):
+        action = self.next_action(frame)
+        if action == DETECT_ACTION:
+            self.recognize(frame)
+        elif action == TRACK_ACTION:
+            self.update_trackers(frame)
+
+    def next_action(self, frame: Image) -> str:
+        ''' Returns whether the frame is skipped, tracked or detected, must be called once by frame '''
+        if self.motion_gate:
+            if not self.motion_gate.update(frame):
+                return SKIP_ACTION
+            if self.motion_gate.resumed:
+                return DETECT_ACTION
+        return DETECT_ACTION if self._should_detect(frame) else TRACK_ACTION
+
+    @property
+    def detection_region(self) -> Optional[ROICoordinates]:
+        return self.motion_gate.detection_region if self.motion_gate else None
+
+    def _should_detect(self, frame: Image) -> bool:
+        confidences = [obj.tracking_confidence for obj in self.detected_objects]
+        lost_qt = sum(1 for obj in self.detected_objects if obj.centroid_traker is None)
+        return self.scheduler.should_detect(frame, confidences, lost_qt)
 
     def recognize(self, frame: Image) -> Iterable[DetectedObject]:
-        detected_objects = self.video_recognition.recognize(frame)
-        self.video_traking_manager.set_trackers(frame, detected_objects)
+        if self._executor:
+            self.submit(frame)
+            self.update_trackers(frame)
+            return self.detected_objects
+        detected_objects = self.detect(frame)
+        self.classify(detected_objects)
         return detected_objects
 
+    def detect(self, frame: Image) -> List[DetectedObject]:
+        ''' Synchronous detection, returns the objects detected in the frame '''
+        region = self.detection_region
+        detected_objects = self.video_recognition.detect(frame, region)
+        self.set_detected_objects(frame, detected_objects, region)
+        return detected_objects
+
+    def classify(self, detected_objects: List[DetectedObject]):
+        self.video_recognition.classify(detected_objects)
+
+    def uncached_objects(self, detected_objects: List[DetectedObject]) -> Tuple[List[DetectedObject], np.ndarray]:
+        ''' Sets the cached classifications, returns the objects that must be classified and their boxes '''
+        return self.video_recognition.uncached_objects(detected_objects)
+
+    def set_classifications(self, detected_objects: List[DetectedObject],
+                            classifications: Iterable[Classification]):
+        ''' Sets the classifications of the objects and caches them '''
+        self.video_recognition.set_classifications(detected_objects, classifications)
+
+    def submit(self, frame: Image) -> Future:
+        ''' Runs the detection in the background worker,
+            while a detection is pending the new frames are not submitted
+        '''
+        if self._pending_detection:
+            return self._pending_detection[2]
+        region = self.detection_region
+        future = self._executor.submit(self.video_recognition.detect, frame, region)
+        self._pending_detection = frame, region, future
+        return future
+
     def update_trackers(self, frame: Image):
+        self._reconcile()
         self.video_traking_manager.update_trackers(frame, self.detected_objects)
 
+    def set_detected_objects(self, frame: Image, detected_objects: List[DetectedObject],
+                             region: Optional[ROICoordinates] = None):
+        ''' Replaces the tracked objects by the ones recognized in the given frame.
+            When the detection was restricted to a region, the tracked objects out of it are kept.
+        '''
+        if region:
+            detected_objects = detected_objects + self.tracked_outside(region)
+        self.video_recognition.detected_objects = detected_objects
+        self.video_traking_manager.set_trackers(frame, detected_objects)
+
+    def tracked_outside(self, region: ROICoordinates) -> List[DetectedObject]:
+        ''' The tracked objects centered out of the region, they keep their trakers and classifications '''
+        region_start_x, region_start_y, region_end_x, region_end_y = region
+        outside_objects = []
+        for obj in self.detected_objects:
+            start_x, start_y, end_x, end_y = obj.roi_image.coordinates
+            center_x, center_y = (start_x + end_x) / 2, (start_y + end_y) / 2
+            if not (region_start_x <= center_x < region_end_x and region_start_y <= center_y < region_end_y):
+                outside_objects.append(obj)
+        return outside_objects
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def _reconcile(self):
+        # the classification was submitted before any later detection, it is applied first
+        self._reconcile_classification()
+        self._reconcile_detection()
+
+    def _reconcile_detection(self):
+        if not self._pending_detection or not self._pending_detection[2].done():
+            return
+        frame, region, future = self._pending_detection
+        self._pending_detection = None
+        try:
+            detected_objects = future.result()
+        except Exception:  # pylint: disable=broad-except
+            LOG.exception('Background recognition failed')
+            return
+        # the trackers start from the frame used by the detection and
+        # catch up with the current frame on the following update
+        self.set_detected_objects(frame, detected_objects, region)
+        # only the new detections are classified. The cache is read and the boxes are
+        # taken now, as the trackers move the objects while the worker classifies them
+        uncached_objects, boxes = self.uncached_objects(detected_objects)
+        if uncached_objects:
+            future = self._executor.submit(self.video_recognition.classify_regions, frame, boxes)
+            self._pending_classification = uncached_objects, future
+
+    def _reconcile_classification(self):
+        if not self._pending_classification or not self._pending_classification[1].done():
+            return
+        detected_objects, future = self._pending_classification
+        self._pending_classification = None
+        try:
+            classifications = future.result()
+        except Exception:  # pylint: disable=broad-except
+            LOG.exception('Background classification failed')
+            return
+        self.set_classifications(detected_objects, classifications)
+
     @property
     def detected_objects(self):
         return self.video_recognition.detected_objects
@@ -31,45 +199,113 @@ class VideoRecognitionTracker(AbstractVideoRecognition, AbstractVideoTrakingMana
 
 class VideoRecognition(AbstractVideoRecognition):
 
-    def __init__(self, detection_model: AbstractDetectionModel, classifier_model: AbstractClasificationModel):
+    def __init__(self, detection_model: AbstractDetectionModel, classifier_model: AbstractClasificationModel,
+                 classification_cache: Optional[ClassificationCache] = None):
         self.detected_objects: List[DetectedObject] = []
         self.classifier_model = classifier_model
         self.detection_model = detection_model
+        self.classification_cache = classification_cache
 
     def recognize(self, frame: Image) -> Iterable[DetectedObject]:
-        self.detected_objects = self._get_detected_objects_in_frame(frame)
-        self._set_classifications()
+        self.detected_objects = self.detect(frame)
+        self.classify(self.detected_objects)
         return self.detected_objects
 
-    def _set_classifications(self):
-        images = [obj.roi_image.image for obj in self.detected_objects]
-        classifications = self.classifier_model.bulk_classify(images)
-        for obj, classification in zip(self.detected_objects, classifications):
-            obj.classification = classification
+    def detect(self, frame: Image, region: Optional[ROICoordinates] = None) -> List[DetectedObject]:
+        ''' Detects the objects of the frame, or of a region of it, without changing the state '''
+        image = frame.crop(region) if region else frame
+        return self.to_detected_objects(frame, self.detection_model.detect(image), region)
 
-    def _get_detected_objects_in_frame(self, frame: Image) -> List[DetectedObject]:
-        roi_images = self.detection_model.detect(frame)
+    @staticmethod
+    def to_detected_objects(frame: Image, roi_images: Iterable[ROIImage],
+                            region: Optional[ROICoordinates] = None) -> List[DetectedObject]:
+        ''' Maps the ROIs detected in a region of the frame to frame coordinates '''
+        if region:
+            offset_x, offset_y = region[:2]
+            frame_roi_images = []
+            for roi_image in roi_images:
+                start_x, start_y, end_x, end_y = roi_image.coordinates
+                coordinates = start_x + offset_x, start_y + offset_y, end_x + offset_x, end_y + offset_y
+                # cropped from the frame on first use
+                frame_roi_images.append(ROIImage(None, coordinates, frame))
+            roi_images = frame_roi_images
         return [DetectedObject(roi_image) for roi_image in roi_images]
 
+    def classify(self, detected_objects: List[DetectedObject]):
+        uncached_objects, boxes = self.uncached_objects(detected_objects)
+        if not uncached_objects:
+            return
+        # the objects of a frame are cropped from it straight into the classifier batch
+        frame = uncached_objects[0].roi_image.parent_image
+        self.set_classifications(uncached_objects, self.classify_regions(frame, boxes))
+
+    def classify_regions(self, frame: Image, boxes: np.ndarray) -> List[Classification]:
+        ''' Only runs the classifier, it can be called by a background worker '''
+        return list(self.classifier_model.classify_regions(frame, boxes))
+
+    def uncached_objects(self, detected_objects: List[DetectedObject]) -> Tuple[List[DetectedObject], np.ndarray]:
+        ''' Sets the cached classifications, returns the objects that must be classified and their boxes '''
+        uncached_objects = self.apply_cached_classifications(detected_objects)
+        return uncached_objects, object_boxes(uncached_objects)
+
+    def set_classifications(self, detected_objects: List[DetectedObject],
+                            classifications: Iterable[Classification]):
+        for obj, classification in zip(detected_objects, classifications):
+            obj.classification = classification
+        self.store_classifications(detected_objects)
+
+    def apply_cached_classifications(self, detected_objects: List[DetectedObject]) -> List[DetectedObject]:
+        ''' Sets the cached classifications, returns the objects that must be classified '''
+        if self.classification_cache is None:
+            return list(detected_objects)
+        self.classification_cache.tick()
+        uncached_objects = []
+        for obj in detected_objects:
+            classification = self.classification_cache.get(obj.id) if obj.id is not None else None
+            if classification is None:
+                uncached_objects.append(obj)
+            else:
+                obj.classification = classification
+        return uncached_objects
+
+    def store_classifications(self, detected_objects: List[DetectedObject]):
+        if self.classification_cache is None:
+            return
+        for obj in detected_objects:
+            if obj.id is not None and obj.classification is not None:
+                obj.classification = self.classification_cache.put(obj.id, obj.classification)
+
+
 
 class VideoTrakingManager(AbstractVideoTrakingManager):
+    ''' The dlib trackers are updated by a thread pool when there are at least
+        parallel_min of them, otherwise they are updated serially.
+    '''
 
     _array_frame: List
     detected_objects: List[DetectedObject]
 
-    def __init__(self):
+    def __init__(self, workers: int = settings.TRACKER_WORKERS,
+                 parallel_min: int = settings.TRACKER_PARALLEL_MIN):
         self.centroid_tracker = CentroidManager()
+        self.workers = workers
+        self.parallel_min = parallel_min
 
     def update_trackers(self, frame: Image, detected_objects):
         self.detected_objects = detected_objects
         self.__update_image(frame)
-        coordinates_list = list(self._update_coordinates())
+        with METRICS.measure("tracker_update"):
+            coordinates_list = list(self._update_coordinates())
         return self._update_centroid_trakers(coordinates_list)
 
     def set_trackers(self, frame: Image, detected_objects):
+        self.detected_objects = detected_objects
         self.__update_image(frame)
-        for obj in detected_objects:
-            obj.tracker = self._create_tracker(obj.roi_image)
+        with METRICS.measure("tracker_start"):
+            for obj in detected_objects:
+                obj.tracker = self._create_tracker(obj.roi_image)
+        # assign the traker IDs on detection frames too
+        self._update_centroid_trakers(object_boxes(detected_objects))
 
     def _create_tracker(self, roi_image: ROIImage):
         tracker = dlib.correlation_tracker()
@@ -78,18 +314,33 @@ class VideoTrakingManager(AbstractVideoTrakingManager):
         return tracker
 
     def _update_coordinates(self):
-        for obj in self.detected_objects:
-            yield self.__update_object_coordinates(obj)
+        if self.workers > 1 and len(self.detected_objects) >= self.parallel_min:
+            return self._update_coordinates_parallel()
+        return map(self.__update_object_coordinates, self.detected_objects)
+
+    def _update_coordinates_parallel(self):
+        # one contiguous chunk of trackers by worker, keeping the objects order
+        chunk_size = math.ceil(len(self.detected_objects) / self.workers)
+        chunks = [
+            self.detected_objects[start:start + chunk_size]
+            for start in range(0, len(self.detected_objects), chunk_size)
+        ]
+        for coordinates_list in tracker_executor(self.workers).map(self.__update_chunk_coordinates, chunks):
+            yield from coordinates_list
+
+    def __update_chunk_coordinates(self, detected_objects: List[DetectedObject]):
+        return [self.__update_object_coordinates(obj) for obj in detected_objects]
 
     def _update_centroid_trakers(self, coordinates_list):
-        centroids = self.centroid_tracker.update(coordinates_list)
+        with METRICS.measure("centroid_matching"):
+            centroids = self.centroid_tracker.update(coordinates_list)
         for obj, centroid in zip(self.detected_objects, centroids):
             obj.centroid_traker = centroid
         return centroids
 
     def __update_object_coordinates(self, detected_object: DetectedObject):
         tracker = detected_object.tracker
-        tracker.update(self._array_frame)
+        detected_object.tracking_confidence = tracker.update(self._array_frame)
         obj, pos = detected_object, tracker.get_position()
         obj.roi_image.coordinates = int(pos.left()), int(pos.top()), int(pos.right()), int(pos.bottom())
         return obj.roi_image.coordinates
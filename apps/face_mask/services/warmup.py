@@ -0,0 +1,27 @@
+import logging
+
+import numpy as np
+
+from core.computer_vision.recognition.detection import AbstractDetectionModel
+from core.computer_vision.recognition.classification import AbstractClasificationModel
+from core.image import Frame
+from core.startup import STARTUP
+from core.utils.decorators import daemon_threaded
+
+LOG = logging.getLogger(__name__)
+
+WARMUP_FRAME_SIZE = (640, 480)
+
+
+@daemon_threaded
+def warm_up(detection_model: AbstractDetectionModel, classification_model: AbstractClasificationModel):
+    ''' Loads the models and runs their first inference, the slowest one, in the background '''
+    width, height = WARMUP_FRAME_SIZE
+    frame = Frame(np.zeros((height, width, 3), dtype="uint8"))
+    try:
+        with STARTUP.measure("detection_warmup"):
+            detection_model.detect(frame)
+        with STARTUP.measure("classifier_warmup"):
+            list(classification_model.bulk_classify([frame]))
+    except Exception:  # pylint: disable=broad-except
+        LOG.exception("model warm-up failed")
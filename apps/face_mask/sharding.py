@@ -0,0 +1,177 @@
+import os
+import logging
+import multiprocessing
+from typing import List, Tuple, Dict, Any, Optional, Callable
+
+import numpy as np
+from scipy.spatial import distance as dist
+from simple_settings import settings
+
+from core.video import VideoStreamer
+from core.metrics import METRICS
+from core.utils.stopwatch import Stopwatch
+from core.computer_vision.recognition.backends import KERAS_BACKEND
+
+from .services.output import AbstractDetectionWriter, CollectionDetectionWriter, Record
+
+LOG = logging.getLogger(__name__)
+
+FrameRange = Tuple[int, int]
+ShardResult = Tuple[List[Record], Stopwatch, Dict[str, Any]]
+
+
+def split_frames(frame_qt: int, shard_qt: int) -> List[FrameRange]:
+    ''' Splits [0, frame_qt) into contiguous frame ranges of similar length '''
+    bounds = np.linspace(0, frame_qt, min(shard_qt, frame_qt) + 1).astype(int).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _init_worker(threads: int):
+    import cv2
+    # every process owns a share of the cores, avoid oversubscription
+    cv2.setNumThreads(threads)
+    if settings.CLASSIFICATION_BACKEND == KERAS_BACKEND:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def _load_models():
+    from .services.face import FaceDetection
+    from .services.mask import MaskClassifier
+    FaceDetection.MODEL  # pylint: disable=pointless-statement
+    MaskClassifier.BACKEND  # pylint: disable=pointless-statement
+
+
+def _process_shard(path: str, frame_range: FrameRange, overlap: int) -> ShardResult:
+    # imported in the worker, so the models are only loaded by the processes using them
+    from .batch import FaceMaskBatchRecognition
+
+    # a pool process may run several shards, or inherit the metrics of the parent when forked
+    METRICS.reset()
+    start, end = frame_range
+    first_frame = max(0, start - overlap)
+    video_source = VideoStreamer(source=path, start_frame=first_frame)
+    writer = CollectionDetectionWriter()
+    recognition = FaceMaskBatchRecognition(video_source, writer, first_frame=first_frame)
+    recognition.run(max_frames=end - first_frame)
+    video_source.stop()
+    # the metrics of the worker process are merged by the parent
+    return writer.records, recognition.stopwatch, METRICS.snapshot()
+
+
+class ShardedVideoRecognition:
+    ''' Processes a video file split into frame ranges by a pool of worker processes.
+        Every shard but the first one starts some frames earlier, the objects of its
+        first frames are matched with the previous shard to keep the traker IDs.
+    '''
+
+    def __init__(self, path: str, workers: int = None,
+                 overlap: int = settings.SHARD_OVERLAP_FRAMES,
+                 worker_threads: int = settings.SHARD_WORKER_THREADS,
+                 max_distance: float = settings.MAX_DISTANCE,
+                 share_models: bool = settings.SHARD_SHARE_MODELS):
+        if share_models and settings.CLASSIFICATION_BACKEND == KERAS_BACKEND:
+            raise ValueError(f"The models can not be shared with the {KERAS_BACKEND} backend")
+        self.path = path
+        self.share_models = share_models
+        self.workers = workers or os.cpu_count()
+        self.overlap = max(1, overlap)
+        self.worker_threads = worker_threads
+        self.max_distance = max_distance
+        self.frame_count = 0
+        self.shard_qt = 0
+        self.stopwatch = Stopwatch()
+        self._next_id = 0
+
+    def run(self, writer: AbstractDetectionWriter, max_frames: Optional[int] = None,
+            on_pool_started: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        ''' on_pool_started: called once the worker processes exist, e.g. to start the threads
+            that must not be running while the workers are forked
+        '''
+        video_source = VideoStreamer(source=self.path)
+        frame_qt = video_source.total_frames
+        video_source.video_stream.release()
+        if max_frames is not None:
+            frame_qt = min(frame_qt, max_frames)
+        frame_ranges = split_frames(frame_qt, self.workers)
+        self.shard_qt = len(frame_ranges)
+        LOG.info("processing %d frames in %d shards", frame_qt, len(frame_ranges))
+        if not frame_ranges:
+            return self.report()
+
+        if self.share_models:
+            if METRICS.is_reporting:
+                raise RuntimeError("The workers can not be forked while the metrics reporter is running")
+            # loaded before forking, the children inherit the weights without copying them
+            with self.stopwatch.measure("model_load"):
+                _load_models()
+            context = multiprocessing.get_context("fork")
+        else:
+            # spawn, the forked TensorFlow runtime is not usable by the children
+            context = multiprocessing.get_context("spawn")
+        tasks = [(self.path, frame_range, self.overlap) for frame_range in frame_ranges]
+        with context.Pool(len(frame_ranges), _init_worker, (self.worker_threads,)) as pool:
+            if on_pool_started:
+                on_pool_started()
+            previous_records: List[Record] = []
+            for frame_range, (records, stopwatch, metrics) in zip(frame_ranges, pool.starmap(_process_shard, tasks)):
+                records = self._stitch(frame_range[0], previous_records, records)
+                writer.write(records)
+                self.stopwatch.merge(stopwatch)
+                METRICS.merge(metrics)
+                self.frame_count += frame_range[1] - frame_range[0]
+                previous_records = records
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        wall_time = self.stopwatch.elapsed
+        return {
+            "frames": self.frame_count,
+            "wall_time_s": wall_time,
+            "fps": self.frame_count / wall_time if wall_time else 0.0,
+            "shards": self.shard_qt,
+            "stages": self.stopwatch.report(),
+        }
+
+    def _stitch(self, start: int, previous_records: List[Record], records: List[Record]) -> List[Record]:
+        ''' Maps the shard local IDs to global IDs and drops the overlapping frames '''
+        id_map = self._match_ids(
+            [rec for rec in previous_records if rec["frame"] == start - 1],
+            [rec for rec in records if rec["frame"] == start - 1])
+        stitched = []
+        for record in records:
+            if record["frame"] < start:
+                continue
+            local_id = record["id"]
+            if local_id is not None:
+                if local_id not in id_map:
+                    id_map[local_id] = self._next_id
+                    self._next_id += 1
+                record["id"] = id_map[local_id]
+            stitched.append(record)
+        return stitched
+
+    def _match_ids(self, previous_records: List[Record], records: List[Record]) -> Dict[int, int]:
+        previous_records = [rec for rec in previous_records if rec["id"] is not None]
+        records = [rec for rec in records if rec["id"] is not None]
+        if not previous_records or not records:
+            return {}
+        distance_array = dist.cdist(self._centroids(previous_records), self._centroids(records))
+        id_map, used_ids = {}, set()
+        # greedy matching, closest pairs first
+        for flat_index in distance_array.argsort(axis=None):
+            row, col = np.unravel_index(flat_index, distance_array.shape)
+            if distance_array[row, col] > self.max_distance:
+                break
+            local_id, global_id = records[col]["id"], previous_records[row]["id"]
+            if local_id in id_map or global_id in used_ids:
+                continue
+            id_map[local_id] = global_id
+            used_ids.add(global_id)
+        return id_map
+
+    @staticmethod
+    def _centroids(records: List[Record]) -> np.ndarray:
+        coordinates = np.array([rec["coordinates"] for rec in records], dtype="float")
+        return (coordinates[:, :2] + coordinates[:, 2:]) / 2.0
@@ -1,19 +1,37 @@
 import tkinter as tk
-from PIL.Image import Image
+from typing import List, Tuple, Hashable
+
+from PIL import Image as image_utils
 from PIL.ImageTk import PhotoImage
+from simple_settings import settings
 
+from core.image import Frame, ROICoordinates, DEFAULT_COLOR_SPACE
+from core.metrics import METRICS
 from core.window import AbstractWindow
-from core.drawer import CanvasDrawer
+from core.drawer import CanvasDrawer, RetainedCanvasDrawer, OpenCVDrawer
+
+CANVAS_RENDERING = 'canvas'
+RETAINED_RENDERING = 'retained'
+OPENCV_RENDERING = 'opencv'
 
 
 class FaceMaskRecognitionWindow(AbstractWindow, tk.Frame):
+    ''' The 'canvas' rendering recreates the frame image and every item on each frame,
+        the 'retained' and 'opencv' ones paste the frame into a single image and
+        either move the canvas items of every traker or draw the boxes into the frame.
+    '''
 
     canvas: tk.Canvas
     drawer: CanvasDrawer
     __last_canvas_image: PhotoImage
 
-    def __init__(self, window_title="Frame"):
+    def __init__(self, window_title="Frame", rendering: str = settings.RENDERING):
+        if rendering not in (CANVAS_RENDERING, RETAINED_RENDERING, OPENCV_RENDERING):
+            raise ValueError(f"Unknown rendering: {rendering}")
         self.window_title = window_title
+        self.rendering = rendering
+        self.__last_canvas_image = None
+        self.__canvas_image_id = None
         super().__init__()
 
     def open(self):
@@ -22,14 +40,25 @@ class FaceMaskRecognitionWindow(AbstractWindow, tk.Frame):
         self.canvas = tk.Canvas(self, highlightthickness=0)
         self.canvas.pack(expand=tk.YES, fill=tk.BOTH)
         self.drawer = CanvasDrawer(self.canvas)
+        self.retained_drawer = RetainedCanvasDrawer(self.canvas)
+        self.overlay_drawer = OpenCVDrawer()
 
     def close(self):
         self.destroy()
 
-    def render(self, frame: Image, detected_objects):
-        self._clean()
-        self._draw_frame(frame)
-        self._draw_boundary_boxes(detected_objects)
+    def render(self, frame: Frame, detected_objects):
+        with METRICS.measure("render"):
+            if self.rendering == CANVAS_RENDERING:
+                self._clean()
+                self._draw_frame(frame)
+                self._draw_boundary_boxes(detected_objects)
+            elif self.rendering == RETAINED_RENDERING:
+                self._paste_frame(frame.to_pil())
+                self.retained_drawer.draw(self._labelled_boxes(detected_objects))
+            else:
+                array = self.overlay_drawer.draw(
+                    frame.to_array(DEFAULT_COLOR_SPACE), self._labelled_boxes(detected_objects))
+                self._paste_frame(image_utils.fromarray(array))
 
     def resize(self, hight: int, width: int):
         self.winfo_toplevel().geometry(f"{hight}x{width}")
@@ -37,12 +66,34 @@ class FaceMaskRecognitionWindow(AbstractWindow, tk.Frame):
     def _clean(self):
         self.canvas.delete("all")
 
-    def _draw_frame(self, frame: Image):
+    def _draw_frame(self, frame: Frame):
         # store the last canvas image,
         # otherwise it will be removed by the garbage collector and will not be displayed
-        self.__last_canvas_image = PhotoImage(image=frame)
+        self.__last_canvas_image = PhotoImage(image=frame.to_pil())
         self.canvas.create_image(0, 0, image=self.__last_canvas_image, anchor=tk.NW)
 
+    def _paste_frame(self, image: image_utils.Image):
+        ''' The canvas image is created once and updated in place while the frame size does not change '''
+        photo_image = self.__last_canvas_image
+        if photo_image is not None and (photo_image.width(), photo_image.height()) == image.size:
+            photo_image.paste(image)
+            return
+        self.__last_canvas_image = PhotoImage(image=image)
+        if self.__canvas_image_id is None:
+            self.__canvas_image_id = self.canvas.create_image(0, 0, image=self.__last_canvas_image, anchor=tk.NW)
+            # below the boxes
+            self.canvas.tag_lower(self.__canvas_image_id)
+        else:
+            self.canvas.itemconfigure(self.__canvas_image_id, image=self.__last_canvas_image)
+
     def _draw_boundary_boxes(self, detected_objects):
         for detected_object in detected_objects:
             self.drawer.draw_boundary_box(detected_object.roi_image, str(detected_object))
+
+    @staticmethod
+    def _labelled_boxes(detected_objects) -> List[Tuple[Hashable, ROICoordinates, str]]:
+        # the untracked objects are keyed by position
+        return [
+            (obj.id if obj.id is not None else ('untracked', i), obj.roi_image.coordinates, str(obj))
+            for i, obj in enumerate(detected_objects)
+        ]
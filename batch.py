@@ -0,0 +1,61 @@
+import os
+import json
+import argparse
+import logging.config
+from pathlib import Path
+
+from simple_settings import settings
+
+from core.video import VideoStreamer, ImageDirectoryStreamer
+from core.metrics import METRICS, start_reporting
+from apps.face_mask.batch import FaceMaskBatchRecognition, log_report
+from apps.face_mask.sharding import ShardedVideoRecognition
+from apps.face_mask.services.output import WRITERS
+
+logging.config.dictConfig(settings.LOGGING)
+LOG = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Headless face mask recognition over a video file or a directory of images")
+    parser.add_argument("input", help="video file or directory of images")
+    parser.add_argument("--output", help="detections file, by default in the output directory")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, a video file is split in frame ranges between them")
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    args = parser.parse_args()
+    if args.workers > 1 and os.path.isdir(args.input):
+        parser.error("--workers splits video files, a directory of images is processed by a single process")
+    return args
+
+
+def open_source(path: str):
+    if os.path.isdir(path):
+        return ImageDirectoryStreamer(path)
+    return VideoStreamer(source=path)
+
+
+def main():
+    args = parse_args()
+    output = args.output or os.path.join(settings.OUTPUT_PATH, f"{Path(args.input).stem}.{args.format}")
+    with WRITERS[args.format](output) as writer:
+        if args.workers > 1:
+            # the reporter threads start once the workers are forked
+            report = ShardedVideoRecognition(args.input, args.workers).run(
+                writer, args.max_frames, on_pool_started=start_reporting)
+        else:
+            start_reporting()
+            video_source = open_source(args.input)
+            report = FaceMaskBatchRecognition(video_source, writer).run(args.max_frames)
+            video_source.stop()
+    log_report(report)
+    METRICS.log_summary()
+    LOG.info("detections written to %s", output)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
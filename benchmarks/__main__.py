@@ -0,0 +1,51 @@
+''' Runs the benchmark suite and writes the results as JSON
+    Usage: python -m benchmarks --settings=conf.settings --output=data/output/benchmarks.json
+'''
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+from .suite import BENCHMARKS
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--real-models", action="store_true",
+                        help="use the trained models of the settings instead of the stand-in ones")
+    parser.add_argument("--output", help="results file, by default printed")
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only:
+        print(f"running {name}", file=sys.stderr)
+        results.extend(BENCHMARKS[name](args.repeat, args.real_models))
+    report = json.dumps({
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "real_models": args.real_models,
+        "results": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as file:
+            file.write(report)
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
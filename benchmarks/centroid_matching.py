@@ -0,0 +1,65 @@
+''' Compares the CentroidManager matching strategies on synthetic crowds
+    Usage: python -m benchmarks.centroid_matching --settings=conf.settings
+'''
+import json
+import time
+import argparse
+from typing import Dict, Any
+
+import numpy as np
+
+from core.computer_vision.tracking import CentroidManager
+
+STRATEGIES = [
+    ("greedy", "distance"),
+    ("hungarian", "distance"),
+    ("hungarian", "iou"),
+]
+FRAME_SIZE = (1920, 1080)
+BOX_SIZE = 40
+
+
+def simulate(track_qt: int, frame_qt: int, matching: str, cost: str, seed: int = 0) -> Dict[str, Any]:
+    ''' Moves track_qt boxes with noise, returns the mean update time and the ID switches '''
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform((0, 0), (FRAME_SIZE[0] - BOX_SIZE, FRAME_SIZE[1] - BOX_SIZE), (track_qt, 2))
+    velocities = rng.normal(0, 4, (track_qt, 2))
+    manager = CentroidManager(matching=matching, cost=cost)
+    previous_ids = np.full(track_qt, -1)
+    id_switches = 0
+    elapsed = 0.0
+    for _ in range(frame_qt):
+        positions += velocities + rng.normal(0, 2, (track_qt, 2))
+        rects = np.hstack((positions, positions + BOX_SIZE)).astype("int")
+        start = time.perf_counter()
+        trakers = manager.update(rects.tolist())
+        elapsed += time.perf_counter() - start
+        ids = np.array([traker.id if traker else -1 for traker in trakers])
+        id_switches += int(np.sum((previous_ids >= 0) & (ids >= 0) & (ids != previous_ids)))
+        previous_ids = ids
+    return {
+        "matching": matching,
+        "cost": cost,
+        "tracks": track_qt,
+        "frames": frame_qt,
+        "mean_update_ms": elapsed / frame_qt * 1000,
+        "id_switches": id_switches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 50, 100, 200, 400])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    args = parser.parse_args()
+    results = [
+        simulate(track_qt, args.frames, matching, cost)
+        for track_qt in args.tracks
+        for matching, cost in STRATEGIES
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
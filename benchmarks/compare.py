@@ -0,0 +1,29 @@
+''' Compares two benchmark result files
+    Usage: python -m benchmarks.compare base.json new.json
+'''
+import json
+import argparse
+
+
+def load(path: str):
+    with open(path, encoding="utf8") as file:
+        results = json.load(file)["results"]
+    return {(res["benchmark"], json.dumps(res["params"], sort_keys=True)): res for res in results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args()
+    base, new = load(args.base), load(args.new)
+    print(f"{'benchmark':<16}{'params':<40}{'base':>10}{'new':>10}{'ratio':>8}")
+    for key in sorted(base.keys() & new.keys()):
+        base_value, new_value = base[key][args.metric], new[key][args.metric]
+        ratio = new_value / base_value if base_value else float("nan")
+        print(f"{key[0]:<16}{key[1]:<40}{base_value:>10.3f}{new_value:>10.3f}{ratio:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
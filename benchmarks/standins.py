@@ -0,0 +1,82 @@
+''' Small models replacing the trained ones, so the benchmarks run offline '''
+import os
+import logging
+from typing import Dict
+
+import numpy as np
+
+from core.image import Frame
+
+LOG = logging.getLogger(__name__)
+
+FRAME_SIZE = (1280, 720)
+
+
+def synthetic_frames(frame_qt: int, frame_size=FRAME_SIZE, seed: int = 0):
+    ''' Noise frames with bright squares moving between them '''
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    background = rng.integers(0, 255, (height, width, 3), dtype="uint8")
+    frames = []
+    for i in range(frame_qt):
+        array = background.copy()
+        for x in range(50, width - 100, 150):
+            for y in range(50, height - 100, 150):
+                array[y + i:y + i + 60, x + i:x + i + 60] = 255
+        frames.append(Frame(array))
+    return frames
+
+
+class StandInDetectionNet:
+    ''' Replaces the SSD cv2.dnn_Net, returns fixed detections in the SSD output layout '''
+
+    def __init__(self, detection_qt: int = 200, face_qt: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.detections = np.zeros((detection_qt, 7), dtype="float32")
+        self.detections[:, 2] = rng.uniform(0.0, 0.3, detection_qt)
+        self.detections[:face_qt, 2] = rng.uniform(0.6, 1.0, face_qt)
+        start = rng.uniform(0.0, 0.9, (detection_qt, 2))
+        self.detections[:, 3:5] = start
+        self.detections[:, 5:7] = start + rng.uniform(0.03, 0.1, (detection_qt, 2))
+        self._batch_qt = 1
+
+    def setInput(self, blob):  # pylint: disable=invalid-name
+        self._batch_qt = blob.shape[0]
+
+    def forward(self):
+        detections = np.tile(self.detections, (self._batch_qt, 1))
+        detections[:, 0] = np.repeat(np.arange(self._batch_qt), len(self.detections))
+        return detections[np.newaxis, np.newaxis]
+
+
+def standin_classifier(image_size=(224, 224), class_qt: int = 2):
+    ''' Tiny Keras CNN with the mask classifier input and output shapes '''
+    from tensorflow.keras import layers, Sequential
+    width, height = image_size
+    return Sequential([
+        layers.Conv2D(8, 3, strides=4, activation="relu", input_shape=(height, width, 3)),
+        layers.Conv2D(16, 3, strides=4, activation="relu"),
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(class_qt, activation="softmax"),
+    ])
+
+
+def standin_model_files(directory: str, image_size=(224, 224)) -> Dict[str, str]:
+    ''' Saves the stand-in classifier in the format of every backend, the formats
+        whose exporter is not installed are left out
+    '''
+    from core.computer_vision.recognition.backends import (
+        KERAS_BACKEND, OPENCV_BACKEND, ONNXRUNTIME_BACKEND, TFLITE_BACKEND)
+    from core.computer_vision.recognition.classification.export import export_onnx, export_tflite
+    model = standin_classifier(image_size)
+    paths = {KERAS_BACKEND: os.path.join(directory, "standin.h5")}
+    model.save(paths[KERAS_BACKEND])
+    try:
+        onnx_path = os.path.join(directory, "standin.onnx")
+        export_onnx(model, onnx_path)
+        paths[OPENCV_BACKEND] = paths[ONNXRUNTIME_BACKEND] = onnx_path
+    except ImportError as error:
+        LOG.warning("onnx export unavailable: %s", error)
+    paths[TFLITE_BACKEND] = os.path.join(directory, "standin.tflite")
+    export_tflite(model, paths[TFLITE_BACKEND])
+    return paths
@@ -0,0 +1,162 @@
+''' Benchmarks of the recognition pipeline stages, every one returns a list of results '''
+import sys
+import itertools
+import tempfile
+from typing import List, Dict, Any, Callable
+
+import cv2
+import numpy as np
+from simple_settings import settings
+
+from core.image import Frame, ImageExtractor
+from core.computer_vision.tracking import CentroidManager
+
+from .standins import synthetic_frames, StandInDetectionNet, standin_classifier, standin_model_files
+from .timing import measure
+
+Result = Dict[str, Any]
+
+
+def _result(benchmark: str, params: Dict[str, Any], stats: Dict[str, float]) -> Result:
+    return {"benchmark": benchmark, "params": params, **stats}
+
+
+def _roi_coordinates(roi_qt: int, frame_size, size: int = 80):
+    ''' Grid of square ROIs inside the frame '''
+    width, _ = frame_size
+    columns = max(1, (width - size) // size)
+    return [
+        ((i % columns) * size, (i // columns) * size, (i % columns + 1) * size, (i // columns + 1) * size)
+        for i in range(roi_qt)
+    ]
+
+
+def bench_detection(repeat: int, real_models: bool) -> List[Result]:
+    from core.computer_vision.recognition.detection import CV2DetectionModel
+    net = StandInDetectionNet()
+    if real_models:
+        from core.utils.model_loader import ModelLoader
+        net = ModelLoader().from_cafe(*settings.FACE_DETECTOR_MODEL_CAFFE)
+
+    class Detection(CV2DetectionModel):
+        MODEL = net
+        IMAGE_SIZE = (300, 300)
+        MEAN = settings.MEAN
+        COLOR_SPACE = 'BGR'
+
+    results = []
+    for tiling in [False, True]:
+        model = Detection(tiling=tiling)
+        for frame_size in [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]:
+            frame = synthetic_frames(1, frame_size)[0]
+            stats = measure(lambda: list(model.detect(Frame(frame.array))), repeat)
+            results.append(_result("detection", {"frame_size": list(frame_size), "tiling": tiling}, stats))
+    return results
+
+
+def bench_classification(repeat: int, real_models: bool) -> List[Result]:
+    from core.computer_vision.recognition.classification.keras import KerasClassificationModel
+    if real_models:
+        from core.utils.model_loader import ModelLoader
+        keras_model = ModelLoader().from_keras(settings.MASK_DETECTOR_MODEL)
+    else:
+        keras_model = standin_classifier(settings.IMAGE_SIZE)
+
+    class Classifier(KerasClassificationModel):
+        MODEL = keras_model
+        CLASES = ['MASK', 'NO_MASK']
+
+    frame = synthetic_frames(1)[0]
+    results = []
+    for roi_qt in [1, 8, 32]:
+        coordinates = _roi_coordinates(roi_qt, frame.size)
+        for batch_size in [1, 8, 32]:
+            model = Classifier(batch_size=batch_size)
+
+            def classify():
+                image_extractor = ImageExtractor(Frame(frame.array))
+                crops = [image_extractor.extract(coords).image for coords in coordinates]
+                return list(model.bulk_classify(crops))
+            stats = measure(classify, repeat)
+            results.append(_result("classification", {"faces": roi_qt, "batch_size": batch_size}, stats))
+    return results
+
+
+def bench_backends(repeat: int, real_models: bool) -> List[Result]:
+    ''' The same classifier run by every installed inference backend '''
+    from core.computer_vision.recognition.backends import BACKENDS, create_backend
+    from core.computer_vision.recognition.classification import InferenceClassificationModel
+
+    frame = synthetic_frames(1)[0]
+    image_extractor = ImageExtractor(frame)
+    crops = [image_extractor.extract(coords).image for coords in _roi_coordinates(32, frame.size)]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        if real_models:
+            from apps.face_mask.services.mask import MODEL_PATHS
+            paths = MODEL_PATHS
+        else:
+            try:
+                paths = standin_model_files(directory, settings.IMAGE_SIZE)
+            except ImportError as error:
+                print(f"the stand-in models need tensorflow: {error!r}", file=sys.stderr)
+                paths = {}
+        class Classifier(InferenceClassificationModel):
+            CLASES = ['MASK', 'NO_MASK']
+
+        for name in BACKENDS:
+            try:
+                backend = create_backend(name, paths[name])
+            except (KeyError, ImportError, OSError, cv2.error) as error:
+                print(f"skipping the {name} backend: {error!r}", file=sys.stderr)
+                continue
+            for batch_size in [1, 8, 32]:
+                model = Classifier(batch_size=batch_size, pad_batch=False, backend=backend)
+                stats = measure(lambda: list(model.bulk_predict(crops)), repeat)
+                results.append(_result("backend", {"backend": name, "faces": len(crops), "batch_size": batch_size},
+                                       stats))
+    return results
+
+
+def bench_tracking(repeat: int, real_models: bool) -> List[Result]:  # pylint: disable=unused-argument
+    from apps.face_mask.models import DetectedObject
+    from apps.face_mask.services.video import VideoTrakingManager
+    from core.image import ROIImage
+
+    frames = synthetic_frames(repeat + 3)
+    results = []
+    for workers, tracker_qt in itertools.product([1, 2, 4], [1, 10, 30]):
+        # parallel from the first tracker, so the sweep measures the thread pool against the serial updates
+        manager = VideoTrakingManager(workers=workers, parallel_min=1)
+        detected_objects = [
+            DetectedObject(ROIImage(None, coords)) for coords in _roi_coordinates(tracker_qt, frames[0].size)
+        ]
+        manager.set_trackers(frames[0], detected_objects)
+        frame_iter = iter(frames[1:])
+        stats = measure(lambda: manager.update_trackers(Frame(next(frame_iter).array), detected_objects), repeat)
+        results.append(_result("tracking", {"workers": workers, "trackers": tracker_qt}, stats))
+    return results
+
+
+def bench_centroid(repeat: int, real_models: bool) -> List[Result]:  # pylint: disable=unused-argument
+    rng = np.random.default_rng(0)
+    results = []
+    for track_qt in [10, 100, 400]:
+        manager = CentroidManager()
+        positions = rng.uniform(0, 1000, (track_qt, 2))
+
+        def update():
+            positions[:] += rng.normal(0, 3, positions.shape)
+            return manager.update(np.hstack((positions, positions + 40)).astype("int").tolist())
+        stats = measure(update, repeat)
+        results.append(_result("centroid", {"tracks": track_qt}, stats))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int, bool], List[Result]]] = {
+    "detection": bench_detection,
+    "classification": bench_classification,
+    "backend": bench_backends,
+    "tracking": bench_tracking,
+    "centroid": bench_centroid,
+}
@@ -0,0 +1,23 @@
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 2) -> Dict[str, float]:
+    ''' Calls func repeatedly, returns its latency statistics in milliseconds '''
+    for _ in range(warmup):
+        func()
+    elapsed = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed[i] = time.perf_counter() - start
+    elapsed *= 1000
+    return {
+        "repeat": repeat,
+        "mean_ms": float(elapsed.mean()),
+        "min_ms": float(elapsed.min()),
+        "p50_ms": float(np.percentile(elapsed, 50)),
+        "p95_ms": float(np.percentile(elapsed, 95)),
+    }
@@ -19,3 +19,6 @@ def register_file(*args):
         file = open(path, "x")
         file.close()
     return path
+
+
+OUTPUT_PATH = register_directory(BASE_PATH, 'data/output')
@@ -8,15 +8,80 @@ TEST_SIZE = 0.2
 IMAGE_SIZE = (224, 224)
 MEAN = (104.0, 177.0, 123.0)
 
+## CLASSIFICATION
+CLASSIFICATION_BATCH_SIZE = 32
+# pad the last batch to CLASSIFICATION_BATCH_SIZE so the graph keeps a fixed input shape
+CLASSIFICATION_PAD_BATCH = True
+
 ## OBJECT TRAKER
 MAX_DISAPPEARED = 50
 MAX_DISTANCE = 50
+# 'greedy' or 'hungarian' (optimal assignment)
+TRAKER_MATCHING = 'greedy'
+# 'distance' between centroids or 'iou' of the bounding boxes
+TRAKER_COST = 'distance'
+TRAKER_MIN_IOU = 0.1
+
+## DLIB TRACKERS
+# threads updating the correlation trackers, 1 updates them serially.
+# Serial by default, the tracking benchmark sweeps the worker quantity
+TRACKER_WORKERS = 1
+# minimum quantity of trackers to update them in parallel
+TRACKER_PARALLEL_MIN = 8
 
 ## OBJECT DETECTOR
 CONFIDENCE = 0.5
+# detect on overlapping tiles of the frame, all in one forward pass, for the small faces of large frames
+DETECTION_TILING = False
+# (columns, rows)
+DETECTION_TILE_GRID = (2, 2)
+# fraction of the tile size shared by consecutive tiles
+DETECTION_TILE_OVERLAP = 0.2
+# also detect on the whole frame, for the faces larger than a tile
+DETECTION_TILE_FULL_FRAME = True
+# merge the overlapping detections by non maximum suppression, always done with tiling
+DETECTION_NMS = False
+# IoU above which the overlapping detections are merged
+NMS_THRESHOLD = 0.4
 
 ## MODELS
 MODELS_DIR = "data/models"
 MASK_DETECTOR_MODEL = MODELS_DIR + "/mask_detector/mask_detector.model"
 FACE_DETECTOR_MODEL_CAFFE = (MODELS_DIR + "/face_detector/deploy.prototxt",
                              MODELS_DIR + "/face_detector/ssd_mobilenet.caffemodel")
+# exported from MASK_DETECTOR_MODEL with export_model.py
+MASK_DETECTOR_MODEL_ONNX = MODELS_DIR + "/mask_detector/mask_detector.onnx"
+MASK_DETECTOR_MODEL_TFLITE = MODELS_DIR + "/mask_detector/mask_detector.tflite"
+# quantized tflite models, formatted with the quantization, exported with quantize_model.py
+MASK_DETECTOR_MODEL_QUANTIZED = MODELS_DIR + "/mask_detector/mask_detector_{}.tflite"
+
+## MODEL CACHE
+# bytes of model files kept loaded, the least recently used models are evicted, None is unbounded
+MODEL_CACHE_MAX_BYTES = None
+
+## INFERENCE BACKEND
+# 'keras', 'opencv' (cv2.dnn), 'onnxruntime' or 'tflite', only 'keras' needs tensorflow
+CLASSIFICATION_BACKEND = 'keras'
+# load the models and run their first inference in the background while the window opens
+MODEL_WARMUP = True
+# quantized tflite classifier: None (float32), 'dynamic', 'float16' or 'int8'
+CLASSIFICATION_QUANTIZATION = None
+
+## QUANTIZATION
+# labelled images, a directory by class in the CLASES order
+QUANTIZATION_DATASET = "data/input/dataset"
+QUANTIZATION_CLASS_DIRS = ['with_mask', 'without_mask']
+QUANTIZATION_CALIBRATION_SIZE = 200
+QUANTIZATION_EVALUATION_SIZE = 1000
+
+## CLASSIFICATION CACHE
+# reuse the classification of the tracked objects between detections
+CLASSIFICATION_CACHE = True
+# detections a cached classification is reused before being refreshed
+CLASSIFICATION_REFRESH_INTERVAL = 10
+# detections an unseen traker is kept in the cache
+CLASSIFICATION_CACHE_TTL = 5
+# cached classifications with a lower prediction are always refreshed
+CLASSIFICATION_MIN_CONFIDENCE = 0.8
+# weight of the new prediction in the exponential smoothing, 1 disables it
+CLASSIFICATION_SMOOTHING = 0.5
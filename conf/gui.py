@@ -4,3 +4,11 @@ FONT_PRINCIPAL = "Consolas"
 FONT_SIZE = 10
 LINE_WIDTH = 5
 LINE_COLOR = "darkblue"
+
+# 'canvas' redraws every item, 'retained' moves the canvas items of every
+# traker and reuses the frame image, 'opencv' draws the boxes into the frame
+RENDERING = 'canvas'
+# RGB colors of the 'opencv' rendering
+OVERLAY_LINE_COLOR = (0, 0, 139)
+OVERLAY_FONT_COLOR = (255, 255, 255)
+OVERLAY_FONT_BG_COLOR = (0, 0, 0)
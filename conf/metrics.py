@@ -0,0 +1,9 @@
+# METRICS
+METRICS_ENABLED = True
+# latencies kept by stage to compute the percentiles
+METRICS_WINDOW = 1000
+# seconds between the metrics log lines, 0 disables them
+METRICS_LOG_INTERVAL = 60
+# local port of the Prometheus text endpoint, None disables it
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = None
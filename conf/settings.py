@@ -2,4 +2,5 @@ from .base import *
 from .computer_vision import *
 from .gui import *
 from .video import *
+from .metrics import *
 from .logging import *
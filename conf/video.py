@@ -1,3 +1,61 @@
 # VIDEO
 VIDEO_SOURCE = 0
+# served together by stream.py
+VIDEO_SOURCES = [VIDEO_SOURCE]
 SKIP_FRAME = 30
+
+# THREADED CAPTURE
+VIDEO_THREADED = False
+FRAME_BUFFER_SIZE = 8
+# 'oldest' or 'newest', the frame discarded when the buffer is full
+FRAME_DROP_POLICY = 'oldest'
+# seconds to wait for a frame, None waits forever
+FRAME_READ_TIMEOUT = 5.0
+
+# run the detection and classification in a background worker
+ASYNC_RECOGNITION = False
+
+# SHARDED PROCESSING
+# frames processed again at the start of every shard to stitch the traker IDs
+SHARD_OVERLAP_FRAMES = 1
+# OpenCV and TensorFlow threads of every shard worker process
+SHARD_WORKER_THREADS = 1
+# load the models once and fork the workers, which share their read-only weights
+# copy-on-write, TensorFlow does not survive a fork so not with the 'keras' backend
+SHARD_SHARE_MODELS = False
+
+# DETECTION SCHEDULING
+# 'fixed' detects every SKIP_FRAME frames, 'adaptive' detects sooner on tracking
+# loss or motion and backs off on static scenes
+DETECTION_SCHEDULING = 'fixed'
+DETECTION_MIN_INTERVAL = 5
+DETECTION_MAX_INTERVAL = 120
+# maximum detections by window of DETECTION_BUDGET_FRAMES frames of a video source,
+# counted in frames so the batch and sharded runs are reproducible
+DETECTION_BUDGET = 4
+# one second of a 30 FPS source
+DETECTION_BUDGET_FRAMES = 30
+# correlation tracker score (peak to side lobe ratio) under which a track is unreliable
+TRACKER_MIN_CONFIDENCE = 7.0
+
+# MOTION
+# width of the downscaled grayscale frame compared between frames
+MOTION_FRAME_WIDTH = 160
+# gray level difference of a changed pixel
+MOTION_PIXEL_THRESHOLD = 25
+# fraction of changed pixels considered motion
+MOTION_THRESHOLD = 0.01
+# 'difference' between consecutive frames or 'background' subtraction
+MOTION_METHOD = 'difference'
+# minimum area, in downscaled pixels, of a motion region
+MOTION_MIN_AREA = 4
+
+# MOTION GATE
+# skip the detection and the tracking while there is no motion
+MOTION_GATE = False
+# frames still processed after the last motion
+MOTION_HOLD_FRAMES = 15
+# the detection is restricted to the motion area when it covers less than this fraction of the frame
+MOTION_REGION_MAX_AREA = 0.5
+# padding of the motion area, as a fraction of the frame size
+MOTION_REGION_PADDING = 0.1
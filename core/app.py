@@ -1,5 +1,6 @@
 import logging
 import tkinter as tk
+from typing import Callable
 
 from .utils.singleton import SingletonMeta
 
@@ -17,11 +18,18 @@ class GUIApp:
         self.root = TkinterRoot()
         self.root.protocol("WM_DELETE_WINDOW", self.root.quit)
         self.root.bind('<Escape>', lambda e: self.root.quit())
+        self._stop_callbacks = []
+
+    def on_stop(self, callback: Callable[[], None]):
+        ''' Registers a callback run once the main loop returns '''
+        self._stop_callbacks.append(callback)
 
     def serve(self):
         LOG.info('started')
         self.root.mainloop()
         LOG.info('stopped')
+        for callback in self._stop_callbacks:
+            callback()
 
     def __enter__(self):
         return self
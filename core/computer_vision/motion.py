@@ -0,0 +1,121 @@
+from typing import Optional, List
+
+import cv2
+import numpy as np
+from simple_settings import settings
+
+from core.image import Image, ROICoordinates, resize_image, GRAY_COLOR_SPACE
+
+DIFFERENCE_METHOD = 'difference'
+BACKGROUND_METHOD = 'background'
+
+
+class MotionDetector:
+    ''' Cheap motion measure on downscaled grayscale frames, either by
+        differencing consecutive frames or by background subtraction.
+    '''
+
+    def __init__(self, width: int = settings.MOTION_FRAME_WIDTH,
+                 pixel_threshold: int = settings.MOTION_PIXEL_THRESHOLD,
+                 method: str = settings.MOTION_METHOD,
+                 min_area: int = settings.MOTION_MIN_AREA):
+        if method not in (DIFFERENCE_METHOD, BACKGROUND_METHOD):
+            raise ValueError(f"Unknown motion method: {method}")
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.method = method
+        self.min_area = min_area
+        self.mask: Optional[np.ndarray] = None
+        self._previous: Optional[np.ndarray] = None
+        self._background = cv2.createBackgroundSubtractorMOG2(detectShadows=False) \
+            if method == BACKGROUND_METHOD else None
+        self._frame = None
+        self._motion = 0.0
+        self._scale = 1.0
+
+    def update(self, frame: Image) -> float:
+        ''' Returns the fraction of changed pixels, the same frame is only measured once '''
+        if frame is self._frame:
+            return self._motion
+        self._frame = frame
+        gray = self._downscale(frame)
+        if self._background is not None:
+            self.mask = self._background.apply(gray) > 0
+        else:
+            previous, self._previous = self._previous, gray
+            if previous is None:
+                self.mask = np.ones(gray.shape, dtype="bool")
+            else:
+                self.mask = cv2.absdiff(gray, previous) > self.pixel_threshold
+        self._motion = np.count_nonzero(self.mask) / self.mask.size
+        return self._motion
+
+    def regions(self) -> List[ROICoordinates]:
+        ''' Bounding boxes of the last motion, in frame coordinates '''
+        if self.mask is None:
+            return []
+        mask = cv2.dilate(self.mask.astype("uint8"), None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        regions = []
+        for contour in contours:
+            if cv2.contourArea(contour) < self.min_area:
+                continue
+            x, y, width, height = cv2.boundingRect(contour)
+            regions.append(tuple(int(coord * self._scale) for coord in (x, y, x + width, y + height)))
+        return regions
+
+    def _downscale(self, frame: Image) -> np.ndarray:
+        width, height = frame.size
+        self._scale = width / self.width
+        size = self.width, max(1, int(height / self._scale))
+        gray = resize_image(frame, size, GRAY_COLOR_SPACE, cv2.INTER_AREA)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+
+class MotionGate:
+    ''' Lets the frames through while there is motion, and for hold_frames after it '''
+
+    def __init__(self, motion_detector: MotionDetector = None,
+                 threshold: float = settings.MOTION_THRESHOLD,
+                 hold_frames: int = settings.MOTION_HOLD_FRAMES,
+                 region_max_area: float = settings.MOTION_REGION_MAX_AREA,
+                 region_padding: float = settings.MOTION_REGION_PADDING):
+        self.motion_detector = motion_detector or MotionDetector()
+        self.threshold = threshold
+        self.hold_frames = hold_frames
+        self.region_max_area = region_max_area
+        self.region_padding = region_padding
+        self.is_idle = False
+        # the gate reopened with the last frame
+        self.resumed = False
+        self._still_frames = 0
+        self._frame_size = None
+
+    def update(self, frame: Image) -> bool:
+        ''' Returns whether the frame must be processed '''
+        self._frame_size = frame.size
+        if self.motion_detector.update(frame) > self.threshold:
+            self._still_frames = 0
+        else:
+            self._still_frames += 1
+        was_idle = self.is_idle
+        self.is_idle = self._still_frames > self.hold_frames
+        self.resumed = was_idle and not self.is_idle
+        return not self.is_idle
+
+    @property
+    def detection_region(self) -> Optional[ROICoordinates]:
+        ''' Padded box around the last motion, None when it is not worth restricting the detection '''
+        regions = self.motion_detector.regions()
+        if not regions or self._frame_size is None:
+            return None
+        width, height = self._frame_size
+        regions = np.array(regions)
+        start_x, start_y = regions[:, :2].min(axis=0)
+        end_x, end_y = regions[:, 2:].max(axis=0)
+        pad_x, pad_y = int(width * self.region_padding), int(height * self.region_padding)
+        start_x, start_y = max(0, start_x - pad_x), max(0, start_y - pad_y)
+        end_x, end_y = min(width, end_x + pad_x), min(height, end_y + pad_y)
+        if (end_x - start_x) * (end_y - start_y) > self.region_max_area * width * height:
+            return None
+        return int(start_x), int(start_y), int(end_x), int(end_y)
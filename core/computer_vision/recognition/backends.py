@@ -0,0 +1,128 @@
+''' Inference runtimes behind a common batch interface, so the same model
+    can run with Keras, OpenCV DNN, ONNX Runtime or TFLite.
+    The optional runtimes are only imported by the backends using them.
+    Every backend loads and owns its runtime model, the backends are cached
+    as a whole by ModelLoader.from_backend.
+'''
+import logging
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Dict, Type
+
+import cv2
+import numpy as np
+
+KERAS_BACKEND = 'keras'
+OPENCV_BACKEND = 'opencv'
+ONNXRUNTIME_BACKEND = 'onnxruntime'
+TFLITE_BACKEND = 'tflite'
+
+LOG = logging.getLogger(__name__)
+
+
+class AbstractInferenceBackend(ABC):
+
+    @abstractmethod
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        ''' Runs a NHWC float32 batch, returns one row of outputs by image '''
+
+
+class KerasBackend(AbstractInferenceBackend):
+
+    def __init__(self, path: str):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class OpenCVBackend(AbstractInferenceBackend):
+    ''' ONNX model run by cv2.dnn, a cv2.dnn_Net is not thread safe '''
+
+    def __init__(self, path: str):
+        self.model = cv2.dnn.readNetFromONNX(path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        self.model.setInput(np.ascontiguousarray(batch))
+        return self.model.forward()
+
+
+class OnnxRuntimeBackend(AbstractInferenceBackend):
+
+    def __init__(self, path: str):
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def load_tflite(path: str):
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    LOG.info("Loading tflite model: %s", path)
+    # the interpreter maps the model file, its weights are shared by the processes using it
+    interpreter = Interpreter(model_path=path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+class TFLiteBackend(AbstractInferenceBackend):
+    ''' The interpreter input is resized when the batch size changes, so the predictions are serialized.
+        The integer inputs and outputs of the fully quantized models are
+        (de)quantized with their scale and zero point.
+    '''
+
+    def __init__(self, path: str):
+        self.interpreter = load_tflite(path)
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.input_index, self.output_index = input_details['index'], output_details['index']
+        self.input_dtype = input_details['dtype']
+        self.input_quantization = input_details['quantization']
+        self.output_quantization = output_details['quantization']
+        self._batch_size = None
+        self._lock = Lock()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = self._quantize(batch)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_index)
+        return self._dequantize(output)
+
+    def _quantize(self, batch: np.ndarray) -> np.ndarray:
+        if self.input_dtype == np.float32:
+            return batch
+        scale, zero_point = self.input_quantization
+        limits = np.iinfo(self.input_dtype)
+        return np.clip(np.round(batch / scale + zero_point), limits.min, limits.max).astype(self.input_dtype)
+
+    def _dequantize(self, output: np.ndarray) -> np.ndarray:
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self.output_quantization
+        return (output.astype("float32") - zero_point) * scale
+
+
+BACKENDS: Dict[str, Type[AbstractInferenceBackend]] = {
+    KERAS_BACKEND: KerasBackend,
+    OPENCV_BACKEND: OpenCVBackend,
+    ONNXRUNTIME_BACKEND: OnnxRuntimeBackend,
+    TFLITE_BACKEND: TFLiteBackend,
+}
+
+
+def create_backend(backend: str, path: str) -> AbstractInferenceBackend:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return BACKENDS[backend](path)
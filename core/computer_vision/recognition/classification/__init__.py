@@ -1 +1,2 @@
 from .abstract import AbstractClasificationModel
+from .inference import InferenceClassificationModel
@@ -1,20 +1,22 @@
 from abc import ABC, abstractmethod
+from itertools import chain
 from typing import Iterable, Tuple
 from operator import itemgetter
 
-from core.image import Image
+import numpy as np
+
+from core.image import Image, Frame
 
 Prediction = Iterable[float]
 
 
 class Classification:
 
-    label: str
-    prediction: float
+    __slots__ = ('classification_list', 'label', 'prediction')
 
     def __init__(self, classification_list: Iterable[Tuple[str, float]]):
-        self.classification_list = classification_list
-        self.label, self.prediction = max(classification_list, key=itemgetter(1))
+        self.classification_list = list(classification_list)
+        self.label, self.prediction = max(self.classification_list, key=itemgetter(1))
 
 
 class AbstractClasificationModel(ABC):
@@ -27,6 +29,14 @@ class AbstractClasificationModel(ABC):
         for img in images:
             yield self.classify(img)
 
+    def classify_regions(self, frame: Frame, boxes: np.ndarray) -> Iterable[Classification]:
+        ''' Classifies the (N, 4) boxes of a frame '''
+        return self.bulk_classify(frame.crop(box) for box in boxes)
+
+    def classify_frames_regions(self, frame_boxes: Iterable[Tuple[Frame, np.ndarray]]) -> Iterable[Classification]:
+        ''' Classifies the (N, 4) boxes of many frames, in frame order '''
+        return chain.from_iterable(self.classify_regions(frame, boxes) for frame, boxes in frame_boxes)
+
     @abstractmethod
     def predict(self, image: Image) -> Prediction:
         pass
@@ -0,0 +1,69 @@
+from typing import Dict, Hashable, Optional
+
+from simple_settings import settings
+
+from .abstract import Classification
+
+
+class CacheEntry:
+
+    def __init__(self, classification: Classification, detection_round: int):
+        self.classification = classification
+        self.refreshed_at = detection_round
+        self.seen_at = detection_round
+
+
+class ClassificationCache:
+    ''' Classifications of the tracked objects by traker ID, counted in detection rounds.
+        A cached classification is reused until it is refresh_interval rounds old or its
+        prediction is under min_confidence. The refreshed predictions are smoothed with
+        the previous ones.
+    '''
+
+    def __init__(self, refresh_interval: int = settings.CLASSIFICATION_REFRESH_INTERVAL,
+                 ttl: int = settings.CLASSIFICATION_CACHE_TTL,
+                 min_confidence: float = settings.CLASSIFICATION_MIN_CONFIDENCE,
+                 smoothing: float = settings.CLASSIFICATION_SMOOTHING):
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.min_confidence = min_confidence
+        self.smoothing = smoothing
+        self.detection_round = 0
+        self._entries: Dict[Hashable, CacheEntry] = {}
+
+    def tick(self):
+        ''' Starts a detection round, evicting the trakers unseen for ttl rounds '''
+        self.detection_round += 1
+        self._entries = {
+            key: entry for key, entry in self._entries.items()
+            if self.detection_round - entry.seen_at <= self.ttl
+        }
+
+    def get(self, key: Hashable) -> Optional[Classification]:
+        ''' Returns the cached classification, None when it must be refreshed '''
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.seen_at = self.detection_round
+        if self.detection_round - entry.refreshed_at >= self.refresh_interval:
+            return None
+        if entry.classification.prediction < self.min_confidence:
+            return None
+        return entry.classification
+
+    def put(self, key: Hashable, classification: Classification) -> Classification:
+        ''' Stores the classification smoothed with the previous one, and returns it '''
+        entry = self._entries.get(key)
+        if entry is not None:
+            classification = self._smooth(entry.classification, classification)
+        self._entries[key] = CacheEntry(classification, self.detection_round)
+        return classification
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _smooth(self, previous: Classification, current: Classification) -> Classification:
+        previous_predictions = dict(previous.classification_list)
+        return Classification(
+            (label, self.smoothing * prediction + (1 - self.smoothing) * previous_predictions.get(label, prediction))
+            for label, prediction in current.classification_list)
@@ -0,0 +1,47 @@
+''' Accuracy and latency of a classifier over a labelled image directory '''
+import os
+import time
+from typing import List, Tuple, Dict
+
+import cv2
+import numpy as np
+from imutils import paths
+
+from core.image import Frame
+from .abstract import AbstractClasificationModel
+
+
+def load_dataset(path: str, class_dirs: List[str], limit: int = None, seed: int = 0) -> Tuple[List[Frame], np.ndarray]:
+    ''' Random sample of the images under a directory by class, class_dirs in the label order '''
+    image_paths = [
+        (image_path, label)
+        for label, class_dir in enumerate(class_dirs)
+        for image_path in paths.list_images(os.path.join(path, class_dir))
+    ]
+    rng = np.random.default_rng(seed)
+    rng.shuffle(image_paths)
+    images, labels = [], []
+    for image_path, label in image_paths[:limit]:
+        image = cv2.imread(image_path)
+        if image is not None:
+            images.append(Frame(image))
+            labels.append(label)
+    return images, np.array(labels)
+
+
+def evaluate(model: AbstractClasificationModel, images: List[Frame], labels: np.ndarray,
+             reference_labels: np.ndarray = None) -> Tuple[Dict[str, float], np.ndarray]:
+    ''' Returns the statistics and the predicted labels, the agreement is the fraction
+        of the images with the same label as a reference model
+    '''
+    start = time.perf_counter()
+    predicted_labels = np.array(list(model.bulk_predict(images))).argmax(axis=1)
+    elapsed = time.perf_counter() - start
+    stats = {
+        "images": len(images),
+        "accuracy": float(np.mean(predicted_labels == labels)),
+        "latency_ms": elapsed / len(images) * 1000,
+    }
+    if reference_labels is not None:
+        stats["agreement"] = float(np.mean(predicted_labels == reference_labels))
+    return stats, predicted_labels
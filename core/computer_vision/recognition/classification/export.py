@@ -0,0 +1,58 @@
+''' Conversion of the trained Keras classifiers to the lighter inference formats,
+    only this step needs tensorflow (and tf2onnx for ONNX).
+'''
+import logging
+from typing import Optional
+
+import numpy as np
+from tensorflow.keras.models import Model as KerasModel
+
+LOG = logging.getLogger(__name__)
+
+ONNX_FORMAT = 'onnx'
+TFLITE_FORMAT = 'tflite'
+
+DYNAMIC_QUANTIZATION = 'dynamic'
+FLOAT16_QUANTIZATION = 'float16'
+INT8_QUANTIZATION = 'int8'
+QUANTIZATIONS = [DYNAMIC_QUANTIZATION, FLOAT16_QUANTIZATION, INT8_QUANTIZATION]
+
+
+def export_onnx(model: KerasModel, path: str, opset: int = 13):
+    ''' The batch dimension stays dynamic, the input keeps the NHWC layout '''
+    import tensorflow as tf
+    import tf2onnx
+    input_signature = [tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input")]
+    tf2onnx.convert.from_keras(model, input_signature=input_signature, opset=opset, output_path=path)
+    LOG.info("Exported onnx model: %s", path)
+
+
+def export_tflite(model: KerasModel, path: str, quantization: Optional[str] = None,
+                  calibration_images: Optional[np.ndarray] = None):
+    ''' Post-training quantization: 'dynamic' range (int8 weights), 'float16' weights,
+        or 'int8' weights and activations calibrated with preprocessed calibration images
+    '''
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization is not None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == FLOAT16_QUANTIZATION:
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == INT8_QUANTIZATION:
+        if calibration_images is None or not len(calibration_images):
+            raise ValueError("The int8 quantization needs calibration images")
+        converter.representative_dataset = lambda: ([image[np.newaxis]] for image in calibration_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(path, "wb") as file:
+        file.write(converter.convert())
+    LOG.info("Exported tflite model: %s (quantization: %s)", path, quantization)
+
+
+EXPORTERS = {
+    ONNX_FORMAT: export_onnx,
+    TFLITE_FORMAT: export_tflite,
+}
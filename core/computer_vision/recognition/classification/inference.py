@@ -0,0 +1,126 @@
+from typing import List, Tuple, Iterable, Optional
+
+from simple_settings import settings
+import numpy as np
+
+from core.image import Image, Frame, resize_image, crop_resize
+from core.metrics import METRICS
+from core.computer_vision.recognition.backends import AbstractInferenceBackend
+from .abstract import AbstractClasificationModel, Classification, Prediction
+
+
+class InferenceClassificationModel(AbstractClasificationModel):
+    ''' Batched image classifier, the forward pass is run by an inference backend,
+        the class BACKEND unless another one is given to the constructor
+    '''
+
+    BACKEND: AbstractInferenceBackend
+    CLASES: List[str]
+    IMAGE_SIZE: Tuple[int, int] = settings.IMAGE_SIZE
+    COLOR_SPACE = 'RGB'
+
+    def __init__(self, batch_size: int = settings.CLASSIFICATION_BATCH_SIZE,
+                 pad_batch: bool = settings.CLASSIFICATION_PAD_BATCH,
+                 backend: Optional[AbstractInferenceBackend] = None):
+        self._backend = backend
+        self.batch_size = batch_size
+        self.pad_batch = pad_batch
+        width, height = self.IMAGE_SIZE
+        # reused by every batch, the rows after the last image are ignored
+        self._batch = np.zeros((batch_size, height, width, 3), dtype="float32")
+        # the images are resized into it, then converted to float in a single copy
+        self._crops = np.zeros((batch_size, height, width, 3), dtype="uint8")
+
+    @property
+    def backend(self) -> AbstractInferenceBackend:
+        return self.BACKEND if self._backend is None else self._backend
+
+    def classify(self, image: Image) -> Classification:
+        prediction_list = self.predict(image)
+        return Classification(zip(self.CLASES, prediction_list))
+
+    def bulk_classify(self, images: Iterable[Image]) -> Iterable[Classification]:
+        for prediction_list in self.bulk_predict(images):
+            yield Classification(zip(self.CLASES, prediction_list))
+
+    def classify_regions(self, frame: Frame, boxes: np.ndarray) -> Iterable[Classification]:
+        for prediction_list in self.predict_regions(frame, boxes):
+            yield Classification(zip(self.CLASES, prediction_list))
+
+    def classify_frames_regions(self, frame_boxes: Iterable[Tuple[Frame, np.ndarray]]) -> Iterable[Classification]:
+        for prediction_list in self.predict_frames_regions(frame_boxes):
+            yield Classification(zip(self.CLASES, prediction_list))
+
+    def predict(self, image: Image) -> Prediction:
+        with METRICS.measure("classifier_preprocess"):
+            arr_img = self._transform_image(image)
+        with METRICS.measure("classifier_predict"):
+            prediction = self._run_batch(arr_img)[0]
+        METRICS.increment("classifications")
+        return prediction
+
+    def bulk_predict(self, images: Iterable[Image]) -> Iterable[Prediction]:
+        images = list(images)
+        for start in range(0, len(images), self.batch_size):
+            yield from self._predict_batch(images[start:start + self.batch_size])
+
+    def predict_regions(self, frame: Frame, boxes: np.ndarray) -> Iterable[Prediction]:
+        ''' Predicts the (N, 4) boxes of the frame, cropped and resized straight into the batch buffer '''
+        return self.predict_frames_regions([(frame, boxes)])
+
+    def predict_frames_regions(self, frame_boxes: Iterable[Tuple[Frame, np.ndarray]]) -> Iterable[Prediction]:
+        ''' Predicts the boxes of many frames, the regions of all the frames share the batches '''
+        image_qt = 0
+        for frame, boxes in frame_boxes:
+            array = frame.to_array(self.COLOR_SPACE)
+            start = 0
+            while start < len(boxes):
+                box_qt = min(len(boxes) - start, self.batch_size - image_qt)
+                with METRICS.measure("classifier_resize"):
+                    crop_resize(array, boxes[start:start + box_qt], self.IMAGE_SIZE, self._crops[image_qt:])
+                start += box_qt
+                image_qt += box_qt
+                if image_qt == self.batch_size:
+                    yield from self._predict_crops(image_qt)
+                    image_qt = 0
+        if image_qt:
+            yield from self._predict_crops(image_qt)
+
+    def _predict_batch(self, images: List[Image]) -> np.ndarray:
+        with METRICS.measure("classifier_resize"):
+            for i, image in enumerate(images):
+                self._resize_image(image, out=self._crops[i])
+        return self._predict_crops(len(images))
+
+    def _predict_crops(self, image_qt: int) -> np.ndarray:
+        ''' Predicts the first image_qt resized crops '''
+        with METRICS.measure("classifier_preprocess"):
+            batch = self._batch[:image_qt]
+            np.copyto(batch, self._crops[:image_qt])
+            self._preprocess(batch)
+        batch = self._batch if self.pad_batch else batch
+        with METRICS.measure("classifier_predict"):
+            predictions = self._run_batch(batch)
+        METRICS.increment("classifications", image_qt)
+        return np.asarray(predictions)[:image_qt]
+
+    def transform_images(self, images: Iterable[Image]) -> np.ndarray:
+        ''' Resized and preprocessed input batch of the images '''
+        batch = np.array([self._resize_image(image) for image in images], dtype="float32")
+        self._preprocess(batch)
+        return batch
+
+    def _run_batch(self, batch: np.ndarray) -> np.ndarray:
+        return self.backend.predict(batch)
+
+    def _transform_image(self, image: Image):
+        arr_img = self._resize_image(image).astype("float32")
+        arr_img = np.expand_dims(arr_img, axis=0)
+        self._preprocess(arr_img)
+        return arr_img
+
+    def _resize_image(self, image: Image, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return resize_image(image, self.IMAGE_SIZE, self.COLOR_SPACE, out=out)
+
+    def _preprocess(self, arr_img: np.ndarray):
+        ''' Model specific input scaling, in place on a whole float32 batch at once '''
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import Iterable, List
 
 from core.image import Image, ROIImage
 
@@ -9,3 +9,6 @@ class AbstractDetectionModel(ABC):
     @abstractmethod
     def detect(self, image: Image) -> Iterable[ROIImage]:
         pass
+
+    def bulk_detect(self, images: Iterable[Image]) -> List[List[ROIImage]]:
+        return [list(self.detect(img)) for img in images]
@@ -1,12 +1,18 @@
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, List
 
 import cv2
+import numpy as np
 from simple_settings import settings
 
-from core.image import Image, ROIImage, ScaledROICoordinates, ImageExtractor, img_to_array
+from core.image import Image, ROIImage, resize_image
+from core.metrics import METRICS
+from core.utils.boxes import non_max_suppression, tile_boxes
 
 from .abstract import AbstractDetectionModel
 
+# compact detections, boxes in image coordinates
+DETECTION_DTYPE = np.dtype([("box", "int32", (4,)), ("score", "float32")])
+
 
 class CV2DetectionModel(AbstractDetectionModel):
 
@@ -16,29 +22,101 @@ class CV2DetectionModel(AbstractDetectionModel):
     SCALEFACTOR: float = 1.0
     COLOR_SPACE = 'RGB'
 
-    def __init__(self, min_confidence: float = settings.CONFIDENCE):
+    def __init__(self, min_confidence: float = settings.CONFIDENCE,
+                 tiling: bool = settings.DETECTION_TILING,
+                 tile_grid: Tuple[int, int] = settings.DETECTION_TILE_GRID,
+                 tile_overlap: float = settings.DETECTION_TILE_OVERLAP,
+                 tile_full_frame: bool = settings.DETECTION_TILE_FULL_FRAME,
+                 nms: bool = settings.DETECTION_NMS,
+                 nms_threshold: float = settings.NMS_THRESHOLD):
         self.min_confidence = min_confidence
+        self.tiling = tiling
+        self.tile_grid = tile_grid
+        self.tile_overlap = tile_overlap
+        self.tile_full_frame = tile_full_frame
+        self.nms = nms
+        self.nms_threshold = nms_threshold
 
     def detect(self, image: Image) -> Iterable[ROIImage]:
-        image_extractor = ImageExtractor(image)
-        detections = self._get_detections(image_extractor.array_image)
-        detection_qt: int = detections.shape[2]
-        for i in range(0, detection_qt):
-            confidence: float = detections[0, 0, i, 2]
-            scaled_roi_coordinates: ScaledROICoordinates = detections[0, 0, i, 3:7]
-            if confidence > self.min_confidence:
-                yield image_extractor.extract_from_scale(scaled_roi_coordinates)
-
-    def _get_detections(self, array_image):
-        array_image = self._transform_image(array_image)
-        blob = cv2.dnn.blobFromImage(
-            array_image,
-            scalefactor=self.SCALEFACTOR,
-            size=self.IMAGE_SIZE,
-            mean=self.MEAN)
-        self.MODEL.setInput(blob)
-        detections = self.MODEL.forward()
+        return self.to_roi_images(image, self.detect_array(image))
+
+    def bulk_detect(self, images: Iterable[Image]) -> List[List[ROIImage]]:
+        ''' Detects the objects of all the images in a single forward pass '''
+        images = list(images)
+        return [
+            self.to_roi_images(image, detections)
+            for image, detections in zip(images, self.bulk_detect_array(images))
+        ]
+
+    def detect_array(self, image: Image) -> np.ndarray:
+        ''' Detections of the image, a DETECTION_DTYPE array of boxes and scores '''
+        return self.bulk_detect_array([image])[0]
+
+    def bulk_detect_array(self, images: List[Image]) -> List[np.ndarray]:
+        ''' With tiling, every image is split in overlapping tiles, the detections of
+            the tiles are mapped to image coordinates and merged by non maximum suppression
+        '''
+        if not images:
+            return []
+        # the regions of the images fed to the network, in image coordinates
+        if self.tiling:
+            region_lists = [
+                tile_boxes(image.width, image.height, self.tile_grid, self.tile_overlap, self.tile_full_frame)
+                for image in images
+            ]
+            inputs = [image.crop(tuple(region)) for image, regions in zip(images, region_lists) for region in regions]
+        else:
+            region_lists = [np.array([[0, 0, image.width, image.height]]) for image in images]
+            inputs = images
+        regions = np.concatenate(region_lists)
+        region_images = np.repeat(np.arange(len(images)), [len(region_list) for region_list in region_lists])
+        detections = self._get_bulk_detections(inputs)[0, 0]
+        with METRICS.measure("roi_extraction"):
+            detections = detections[detections[:, 2] > self.min_confidence]
+            # the first column of every detection is the index of its input in the batch
+            input_indexes = detections[:, 0].astype("int")
+            detection_regions = regions[input_indexes]
+            origins = np.tile(detection_regions[:, :2], 2)
+            scales = np.tile(detection_regions[:, 2:] - detection_regions[:, :2], 2)
+            boxes = (detections[:, 3:7] * scales + origins).astype("int")
+            detection_images = region_images[input_indexes]
+            return [
+                self._to_detection_array(image, boxes[detection_images == i], detections[detection_images == i, 2])
+                for i, image in enumerate(images)
+            ]
+
+    @staticmethod
+    def to_roi_images(image: Image, detections: np.ndarray) -> List[ROIImage]:
+        ''' The ROI images are cropped on their first use '''
+        return [ROIImage(None, tuple(box), image) for box in detections["box"].tolist()]
+
+    def _to_detection_array(self, image: Image, boxes: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        # ensure the bounding boxes fall within the dimensions of the image
+        max_x, max_y = image.width - 1, image.height - 1
+        boxes = np.clip(boxes, 0, [max_x, max_y, max_x, max_y])
+        if self.nms or self.tiling:
+            kept = non_max_suppression(boxes, scores, self.nms_threshold)
+            boxes, scores = boxes[kept], scores[kept]
+        detections = np.empty(len(boxes), dtype=DETECTION_DTYPE)
+        detections["box"] = boxes
+        detections["score"] = scores
+        METRICS.increment("detections", len(detections))
         return detections
 
+    def _get_bulk_detections(self, images: List[Image]):
+        array_images = [self._transform_image(image) for image in images]
+        with METRICS.measure("blob"):
+            blob = cv2.dnn.blobFromImages(
+                array_images,
+                scalefactor=self.SCALEFACTOR,
+                size=self.IMAGE_SIZE,
+                mean=self.MEAN)
+        with METRICS.measure("ssd_forward"):
+            # a single access, the same network gets the input and runs it
+            model = self.MODEL
+            model.setInput(blob)
+            return model.forward()
+
     def _transform_image(self, img: Image):
-        return img_to_array(img, self.COLOR_SPACE)
+        # resized by the frame cache, the blob is built without resizing again
+        return resize_image(img, self.IMAGE_SIZE, self.COLOR_SPACE)
@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Sequence, Optional
+
+import numpy as np
+from simple_settings import settings
+
+from core.image import Image
+from .motion import MotionDetector
+
+FIXED_SCHEDULING = 'fixed'
+ADAPTIVE_SCHEDULING = 'adaptive'
+
+
+class AbstractDetectionScheduler(ABC):
+    ''' Decides, frame by frame, whether the detection runs or the trackers are updated '''
+
+    @abstractmethod
+    def should_detect(self, frame: Image, confidences: Sequence[Optional[float]], lost_qt: int) -> bool:
+        ''' Called once by frame, with the tracking state of the previous frame '''
+
+
+class FixedDetectionScheduler(AbstractDetectionScheduler):
+
+    def __init__(self, interval: int = settings.SKIP_FRAME):
+        self.interval = interval
+        self.frame_count = 0
+
+    def should_detect(self, frame: Image, confidences: Sequence[Optional[float]], lost_qt: int) -> bool:
+        detect = self.frame_count % self.interval == 0
+        self.frame_count += 1
+        return detect
+
+
+class AdaptiveDetectionScheduler(AbstractDetectionScheduler):
+    ''' Detects sooner when the trackers are unreliable, tracks are lost or there is motion,
+        and doubles the interval, up to max_interval, while the scene stays quiet.
+        At most `budget` detections are allowed in any window of `budget_frames` frames.
+    '''
+
+    def __init__(self, min_interval: int = settings.DETECTION_MIN_INTERVAL,
+                 max_interval: int = settings.DETECTION_MAX_INTERVAL,
+                 budget: int = settings.DETECTION_BUDGET,
+                 budget_frames: int = settings.DETECTION_BUDGET_FRAMES,
+                 min_confidence: float = settings.TRACKER_MIN_CONFIDENCE,
+                 motion_threshold: float = settings.MOTION_THRESHOLD,
+                 motion_detector: MotionDetector = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.budget_frames = budget_frames
+        self.min_confidence = min_confidence
+        self.motion_threshold = motion_threshold
+        self.motion_detector = motion_detector or MotionDetector()
+        self.interval = int(np.clip(settings.SKIP_FRAME, min_interval, max_interval))
+        # detect on the first frame
+        self.frames_since_detection = max_interval
+        self.frame_count = 0
+        # frame indexes of the detections within the budget window
+        self._detection_frames = deque()
+
+    def should_detect(self, frame: Image, confidences: Sequence[Optional[float]], lost_qt: int) -> bool:
+        self.frame_count += 1
+        self.frames_since_detection += 1
+        motion = self.motion_detector.update(frame)
+        if self.frames_since_detection < self.min_interval or not self._has_budget():
+            return False
+        triggered = self._is_triggered(confidences, lost_qt, motion)
+        if not triggered and self.frames_since_detection < self.interval:
+            return False
+        if triggered:
+            self.interval = max(self.min_interval, self.interval // 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        self.frames_since_detection = 0
+        self._detection_frames.append(self.frame_count)
+        return True
+
+    def _is_triggered(self, confidences: Sequence[Optional[float]], lost_qt: int, motion: float) -> bool:
+        unreliable = any(conf is not None and conf < self.min_confidence for conf in confidences)
+        return unreliable or lost_qt > 0 or motion > self.motion_threshold
+
+    def _has_budget(self) -> bool:
+        while self._detection_frames and self.frame_count - self._detection_frames[0] >= self.budget_frames:
+            self._detection_frames.popleft()
+        return len(self._detection_frames) < self.budget
+
+
+def create_scheduler(scheduling: str = settings.DETECTION_SCHEDULING,
+                     motion_detector: MotionDetector = None) -> AbstractDetectionScheduler:
+    if scheduling == FIXED_SCHEDULING:
+        return FixedDetectionScheduler()
+    if scheduling == ADAPTIVE_SCHEDULING:
+        return AdaptiveDetectionScheduler(motion_detector=motion_detector)
+    raise ValueError(f"Unknown detection scheduling: {scheduling}")
@@ -1,34 +1,84 @@
-from typing import Set, Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
 from collections import OrderedDict
 
 import numpy as np
 from scipy.spatial import distance as dist
+from scipy.optimize import linear_sum_assignment
 from simple_settings import settings
 
 from core.image import ROICoordinates
+from core.utils.boxes import box_iou
 
 
 Centroid = Tuple[int, int]
 TrakerID = int
 
+GREEDY_MATCHING = 'greedy'
+HUNGARIAN_MATCHING = 'hungarian'
+DISTANCE_COST = 'distance'
+IOU_COST = 'iou'
+# cost of the gated pairs, high enough to never be preferred by the optimal assignment
+GATED_COST = 1e9
+INITIAL_CAPACITY = 32
+
 
 class CentroidTraker:
+    ''' Traker registered by a CentroidManager, created once by traker. Its centroid and
+        disappeared count are read from the arrays of the manager while it is registered.
+    '''
+
+    __slots__ = ('id', 'manager', 'slot')
 
-    def __init__(self, id: TrakerID, centroid: Centroid):
+    def __init__(self, id: TrakerID, manager: "CentroidManager", slot: int):
         self.id = id
-        self.centroid = centroid
-        self.disappeared_count = 0
+        self.manager = manager
+        # index in the arrays of the manager, None once deregistered
+        self.slot = slot
 
+    @property
+    def centroid(self) -> Optional[Centroid]:
+        if self.slot is None:
+            return None
+        return tuple(self.manager.centroids[self.slot].tolist())
 
-class CentroidManager:
+    @property
+    def disappeared_count(self) -> Optional[int]:
+        if self.slot is None:
+            return None
+        return int(self.manager.disappeared_counts[self.slot])
 
-    def __init__(self, max_disappeared=settings.MAX_DISAPPEARED, max_distance=settings.MAX_DISTANCE):
-        # initialize the next unique traker ID along with two ordered
-        # dictionaries used to keep track of mapping a given traker
-        # ID to its centroid and number of consecutive frames it has
-        # been marked as "disappeared", respectively
+
+class CentroidManager:
+    ''' The state of the trakers is held in preallocated arrays, where the same slot
+        refers to the same traker: ids, centroids, rectangles, disappeared counts and
+        whether it is active. The trakers are appended in registration order, the slots
+        of the deregistered ones are reclaimed by compacting the arrays once they are full,
+        and the capacity is doubled when the active trakers do not fit.
+
+        The input centroids are matched to the trakers either greedily or by the optimal
+        (hungarian) assignment, using the centroid distance or the rectangles IoU as cost.
+    '''
+
+    def __init__(self, max_disappeared=settings.MAX_DISAPPEARED, max_distance=settings.MAX_DISTANCE,
+                 matching: str = settings.TRAKER_MATCHING, cost: str = settings.TRAKER_COST,
+                 min_iou: float = settings.TRAKER_MIN_IOU, capacity: int = INITIAL_CAPACITY):
+        if matching not in (GREEDY_MATCHING, HUNGARIAN_MATCHING):
+            raise ValueError(f"Unknown matching strategy: {matching}")
+        if cost not in (DISTANCE_COST, IOU_COST):
+            raise ValueError(f"Unknown matching cost: {cost}")
+        # initialize the next unique traker ID
         self.counter = 0
-        self.trakers: Dict[CentroidTraker] = OrderedDict()
+        self.ids = np.empty(capacity, dtype="int")
+        self.centroids = np.empty((capacity, 2), dtype="int")
+        self.rects = np.empty((capacity, 4), dtype="float")
+        self.disappeared_counts = np.zeros(capacity, dtype="int")
+        self.active = np.zeros(capacity, dtype="bool")
+        # slots used since the last compaction, the next traker is registered at this slot
+        self.size = 0
+        self.trakers: Dict[TrakerID, CentroidTraker] = OrderedDict()
+        self._slot_trakers: List[Optional[CentroidTraker]] = [None] * capacity
+        self.matching = matching
+        self.cost = cost
 
         # store the number of maximum consecutive frames a given
         # traker is allowed to be marked as "disappeared" until we
@@ -39,109 +89,165 @@ class CentroidManager:
         # an traker -- if the distance is larger than this maximum
         # distance we'll start to mark the traker as "disappeared"
         self.max_distance = max_distance
-        # aux variable
-        self._input_centroids = None
-
-    def register(self, centroid: Centroid):
-        # when registering an traker we use the next available traker
-        # ID to store the centroid
-        self.trakers[self.counter] = CentroidTraker(self.counter, centroid)
-        self.counter += 1
 
-    def deregister(self, traker_id: TrakerID):
-        # to deregister an traker ID we delete the traker ID from
-        # both of our respective dictionaries
-        del self.trakers[traker_id]
-
-    def update(self, rects: List[ROICoordinates]):
+        # store the minimum IoU between rectangles to associate an traker,
+        # used by the IoU cost
+        self.min_iou = min_iou
+
+    @property
+    def capacity(self) -> int:
+        return len(self.ids)
+
+    def register(self, centroids: np.ndarray, rects: np.ndarray) -> np.ndarray:
+        ''' Returns the slots of the new trakers '''
+        if self.size + len(centroids) > self.capacity:
+            self._compact(len(centroids))
+        slots = np.arange(self.size, self.size + len(centroids))
+        self.size += len(centroids)
+        # when registering trakers we use the next available traker
+        # IDs to store the centroids
+        self.ids[slots] = np.arange(self.counter, self.counter + len(centroids))
+        self.counter += len(centroids)
+        self.centroids[slots] = centroids
+        self.rects[slots] = rects
+        self.disappeared_counts[slots] = 0
+        self.active[slots] = True
+        for slot, traker_id in zip(slots.tolist(), self.ids[slots].tolist()):
+            traker = CentroidTraker(traker_id, self, slot)
+            self._slot_trakers[slot] = traker
+            self.trakers[traker_id] = traker
+        return slots
+
+    def deregister(self, slots: np.ndarray):
+        self.active[slots] = False
+        for slot in slots.tolist():
+            traker = self._slot_trakers[slot]
+            traker.slot = None
+            self._slot_trakers[slot] = None
+            del self.trakers[traker.id]
+
+    def update(self, rects: List[ROICoordinates]) -> List[Optional[CentroidTraker]]:
+        ''' Returns the traker of each input rectangle, None when it was not assigned '''
+        # room for every input to be registered, the slots do not move while matching
+        if self.size + len(rects) > self.capacity:
+            self._compact(len(rects))
+        rows = np.flatnonzero(self.active[:self.size])
         # check to see if the list of input bounding box rectangles
         # is empty
         if len(rects) == 0:
-            self._deregister_max_desappeared_trakers()
+            self._mark_disappeared(rows)
             # return early as there are no centroids or tracking info
             # to update
-            return self.trakers
+            return []
 
-        self._input_centroids = self._get_input_centroids(rects)
+        input_rects = np.asarray(rects, dtype="float")
+        input_centroids = self._get_input_centroids(input_rects)
+        input_slots = np.full(len(input_centroids), -1)
 
         # if we are currently not tracking any trakers take the input
         # centroids and register each of them
-        if len(self.trakers) == 0:
-            for i in range(0, len(self._input_centroids)):
-                self.register(self._input_centroids[i])
+        if len(rows) == 0:
+            input_slots[:] = self.register(input_centroids, input_rects)
         else:
             # otherwise, are are currently tracking trakers so we need to
             # try to match the input centroids to existing traker
             # centroids
-            self.match_input_centroid_to_traker()
-        # return the set of trakers
-        return self._get_centroids()
-
-    def _get_centroids(self):
-        centroids = [None] * len(self._input_centroids)
-        centroids_map = {
-            tuple(cent): idx
-            for idx, cent in enumerate(self._input_centroids)
-        }
-        for traker in self.trakers.values():
-            idx = centroids_map.get(tuple(traker.centroid))
-            if idx is not None:
-                centroids[idx] = traker
-        return centroids
-
-    def match_input_centroid_to_traker(self):
-        # compute the distance between each pair of traker
-        # centroids and input centroids, respectively -- our
-        # goal will be to match an input centroid to an existing
-        # traker centroid
-        centroids_list = [traker.centroid for traker in self.trakers.values()]
-        distance_array = dist.cdist(centroids_list, self._input_centroids)
-        unused_rows, unused_cols = self._get_unused_pixles(distance_array)
+            self.match_input_centroid_to_traker(rows, input_centroids, input_rects, input_slots)
+        return [self._slot_trakers[slot] if slot >= 0 else None for slot in input_slots.tolist()]
+
+    def match_input_centroid_to_traker(self, rows: np.ndarray, input_centroids: np.ndarray,
+                                       input_rects: np.ndarray, input_slots: np.ndarray):
+        ''' rows: slots of the active trakers, input_slots: set to the slot matched by every input '''
+        # compute the cost between each pair of trakers and
+        # input centroids, respectively -- our goal will be to
+        # match an input centroid to an existing traker centroid
+        distance_array, max_cost = self._get_cost_array(rows, input_centroids, input_rects)
+        if self.matching == HUNGARIAN_MATCHING:
+            matched_rows, cols = self._match_optimal(distance_array, max_cost)
+        else:
+            matched_rows, cols = self._match_greedy(distance_array, max_cost)
+
+        # grab the traker of every matched row, set its new centroid,
+        # and reset the disappeared counter
+        slots = rows[matched_rows]
+        self.centroids[slots] = input_centroids[cols]
+        self.rects[slots] = input_rects[cols]
+        self.disappeared_counts[slots] = 0
+        input_slots[cols] = slots
+
         # in the event that the number of traker centroids is
         # equal or greater than the number of input centroids
         # we need to check and see if some of these trakers have
         # potentially disappeared
         if distance_array.shape[0] >= distance_array.shape[1]:
-            self._unregister_disappeared_trakers(unused_rows)
-        # otherwise, if the number of input centroids is greater
-        # than the number of existing traker centroids we need to
-        # register each new input centroid as a traker
-        else:
-            self._register_appeared_trakers(unused_cols)
-
-    def _get_input_centroids(self, rects: List[ROICoordinates]) -> List[Centroid]:
-        # initialize an array of input centroids for the current frame
-        input_centroids = np.zeros((len(rects), 2), dtype="int")
-
-        # loop over the bounding box rectangles
-        for i, (start_x, start_y, end_x, end_y) in enumerate(rects):
-            # use the bounding box coordinates to derive the centroid
-            c_x = int((start_x + end_x) / 2.0)
-            c_y = int((start_y + end_y) / 2.0)
-            input_centroids[i] = (c_x, c_y)
-        return input_centroids
-
-    def _deregister_max_desappeared_trakers(self) -> None:
-        # loop over any existing tracked trakers and mark them
-        # as disappeared
-
-        for traker in list(self.trakers.values()):
-            traker.disappeared_count += 1
-
-            # if we have reached a maximum number of consecutive
-            # frames where a given traker has been marked as
-            # missing, deregister it
-            if traker.disappeared_count > self.max_disappeared:
-                self.deregister(traker.id)
-
-    def _get_unused_pixles(self, distance_array):
-        used_rows, used_cols = self._get_used_indexes(distance_array)
-        # compute both the row and column index we have NOT yet examined
-        unused_rows = set(range(0, distance_array.shape[0])).difference(used_rows)
-        unused_cols = set(range(0, distance_array.shape[1])).difference(used_cols)
-        return unused_rows, unused_cols
-
-    def _get_used_indexes(self, distance_array):
+            unused_rows = np.ones(distance_array.shape[0], dtype="bool")
+            unused_rows[matched_rows] = False
+            self._mark_disappeared(rows[unused_rows])
+        # register each input centroid left unmatched as a new traker, whatever
+        # the quantity of trakers, as the gated pairs are never associated
+        unused_cols = np.ones(distance_array.shape[1], dtype="bool")
+        unused_cols[cols] = False
+        if unused_cols.any():
+            input_slots[unused_cols] = self.register(input_centroids[unused_cols], input_rects[unused_cols])
+
+    @staticmethod
+    def _get_input_centroids(rects: np.ndarray) -> np.ndarray:
+        # use the bounding box coordinates to derive the centroids
+        return ((rects[:, :2] + rects[:, 2:]) / 2.0).astype("int")
+
+    def _mark_disappeared(self, slots: np.ndarray):
+        self.disappeared_counts[slots] += 1
+        # if we have reached a maximum number of consecutive
+        # frames where a given traker has been marked as
+        # missing, deregister it
+        self.deregister(slots[self.disappeared_counts[slots] > self.max_disappeared])
+
+    def _compact(self, extra: int):
+        ''' Moves the active trakers to the first slots, keeping their order,
+            and doubles the capacity until the extra trakers fit
+        '''
+        slots = np.flatnonzero(self.active[:self.size])
+        qt = len(slots)
+        capacity = self.capacity
+        while qt + extra > capacity:
+            capacity *= 2
+        grow = capacity != self.capacity
+        for name in ('ids', 'centroids', 'rects', 'disappeared_counts'):
+            array = getattr(self, name)
+            if grow:
+                compacted = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+                compacted[:qt] = array[slots]
+                setattr(self, name, compacted)
+            else:
+                array[:qt] = array[slots]
+        self.active = np.zeros(capacity, dtype="bool")
+        self.active[:qt] = True
+        slot_trakers = [None] * capacity
+        for new_slot, slot in enumerate(slots.tolist()):
+            traker = self._slot_trakers[slot]
+            traker.slot = new_slot
+            slot_trakers[new_slot] = traker
+        self._slot_trakers = slot_trakers
+        self.size = qt
+
+    def _get_cost_array(self, rows: np.ndarray, input_centroids: np.ndarray,
+                        input_rects: np.ndarray) -> Tuple[np.ndarray, float]:
+        ''' Returns the cost of every (traker, input) pair and the maximum cost to associate them '''
+        if self.cost == IOU_COST:
+            return 1.0 - box_iou(self.rects[rows], input_rects), 1.0 - self.min_iou
+        return dist.cdist(self.centroids[rows], input_centroids), self.max_distance
+
+    @staticmethod
+    def _match_optimal(distance_array: np.ndarray, max_cost: float) -> Tuple[np.ndarray, np.ndarray]:
+        ''' Minimum total cost assignment, returns the matched (row, column) index pairs '''
+        gated = distance_array > max_cost
+        rows, cols = linear_sum_assignment(np.where(gated, GATED_COST, distance_array))
+        close = ~gated[rows, cols]
+        return rows[close], cols[close]
+
+    @staticmethod
+    def _match_greedy(distance_array: np.ndarray, max_cost: float) -> Tuple[np.ndarray, np.ndarray]:
+        ''' Greedy matching, returns the matched (row, column) index pairs '''
         # in order to perform this matching we must (1) find the
         # smallest value in each row and then (2) sort the row
         # indexes based on their minimum values so that the row
@@ -154,52 +260,18 @@ class CentroidManager:
         # sorting using the previously computed row index list
         cols = distance_array.argmin(axis=1)[rows]
 
-        # in order to determine if we need to update, register,
-        # or deregister an traker we need to keep track of which
-        # of the rows and column indexes we have already examined
-        used_rows: Set[int] = set()
-        used_cols: Set[int] = set()
-
-        traker_ids = list(self.trakers.keys())
-        # loop over the combination of the (row, column) index
-        # tuples
-        for (row, col) in zip(rows, cols):
-            # if the distance between centroids is greater than
-            # the maximum distance, do not associate the two
-            # centroids to the same traker
-            if distance_array[row, col] > self.max_distance:
-                continue
-
-            # otherwise, grab the traker ID for the current row,
-            # set its new centroid, and reset the disappeared
-            # counter
-            traker_id = traker_ids[row]
-            traker = self.trakers[traker_id]
-            traker.centroid = self._input_centroids[col]
-            traker.disappeared_count = 0
-
-            # indicate that we have examined each of the row and
-            # column indexes, respectively
-            used_rows.add(row)
-            used_cols.add(col)
-        return used_rows, used_cols
-
-    def _unregister_disappeared_trakers(self, unused_rows):
-        # grab the set of traker IDs and corresponding centroids
-        traker_ids = list(self.trakers.keys())
-        # loop over the unused row indexes
-        for row in unused_rows:
-            # grab the traker ID for the corresponding row
-            # index and increment the disappeared counter
-            traker_id = traker_ids[row]
-            traker = self.trakers[traker_id]
-            traker.disappeared_count += 1
-            # check to see if the number of consecutive
-            # frames the traker has been marked "disappeared"
-            # for warrants deregistering the traker
-            if traker.disappeared_count > self.max_disappeared:
-                self.deregister(traker_id)
-
-    def _register_appeared_trakers(self, unused_cols):
-        for col in unused_cols:
-            self.register(self._input_centroids[col])
+        # a column is only assigned to the first row, in the above
+        # order, that has it as its closest column: the closest traker
+        # wins a contested input and the others are left unmatched, to be
+        # marked as disappeared. The original loop assigned the input to all
+        # of them, which then shared its centroid, and it got the traker
+        # registered last
+        _, first_indexes = np.unique(cols, return_index=True)
+        first_indexes.sort()
+        rows, cols = rows[first_indexes], cols[first_indexes]
+
+        # if the distance between centroids is greater than
+        # the maximum distance, do not associate the two
+        # centroids to the same traker
+        close = distance_array[rows, cols] <= max_cost
+        return rows[close], cols[close]
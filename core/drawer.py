@@ -1,7 +1,11 @@
+from typing import Dict, Hashable, Iterable, Tuple, Optional
 from tkinter import Canvas
+
+import cv2
+import numpy as np
 from simple_settings import settings
 
-from core.image import ROIImage
+from core.image import ROIImage, ROICoordinates
 
 
 class CanvasDrawer:
@@ -42,3 +46,92 @@ class CanvasDrawer:
             outline=settings.FONT_BG_COLOR
         )
         self.canvas.tag_lower(rectangle, label_id)
+
+
+class RetainedCanvasDrawer:
+    ''' Keeps the canvas items of every key (e.g. a traker ID) between frames,
+        they are only moved, and retexted when their label changes
+    '''
+
+    TEXT_OFFSET = 13
+
+    def __init__(self, canvas: Canvas):
+        self.canvas = canvas
+        # key: (box, text, background, text extent), the background is None without FONT_BG_COLOR
+        self._items: Dict[Hashable, list] = {}
+        self._labels: Dict[Hashable, str] = {}
+
+    def draw(self, boxes: Iterable[Tuple[Hashable, ROICoordinates, str]]):
+        ''' Draws the labelled boxes, the items of the keys not given are deleted '''
+        keys = set()
+        for key, coordinates, label in boxes:
+            keys.add(key)
+            if key not in self._items:
+                self._items[key] = self._create_items()
+            self._move(key, coordinates, label)
+        for key in self._items.keys() - keys:
+            self.canvas.delete(*(item for item in self._items.pop(key)[:3] if item is not None))
+            self._labels.pop(key, None)
+
+    def clear(self):
+        self.draw([])
+
+    def _create_items(self) -> list:
+        box = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline=settings.LINE_COLOR, width=settings.LINE_WIDTH)
+        background = self.canvas.create_rectangle(
+            0, 0, 0, 0, fill=settings.FONT_BG_COLOR, outline=settings.FONT_BG_COLOR) \
+            if settings.FONT_BG_COLOR else None
+        text = self.canvas.create_text(
+            0, 0, anchor="nw", font=(settings.FONT_PRINCIPAL, settings.FONT_SIZE), fill=settings.FONT_COLOR)
+        return [box, text, background, (0, 0, 0, 0)]
+
+    def _move(self, key: Hashable, coordinates: ROICoordinates, label: str):
+        box, text, background, extent = self._items[key]
+        start_x, start_y, end_x, end_y = coordinates
+        text_x, text_y = start_x + self.TEXT_OFFSET, start_y
+        self.canvas.coords(box, start_x, start_y, end_x, end_y)
+        self.canvas.coords(text, text_x, text_y)
+        if self._labels.get(key) != label:
+            self._labels[key] = label
+            self.canvas.itemconfigure(text, text=label)
+            # the text extent is only measured when the label changes
+            bbox = self.canvas.bbox(text)
+            extent = bbox[0] - text_x, bbox[1] - text_y, bbox[2] - text_x, bbox[3] - text_y
+            self._items[key][3] = extent
+        if background is not None:
+            self.canvas.coords(
+                background,
+                text_x + extent[0] - 15, text_y + extent[1] - 5,
+                text_x + extent[2] + 15, text_y + extent[3] + 5)
+
+
+class OpenCVDrawer:
+    ''' Draws the labelled boxes into an RGB image buffer '''
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(self):
+        self.font_scale = settings.FONT_SIZE / 25
+        self._buffer: Optional[np.ndarray] = None
+
+    def draw(self, array: np.ndarray, boxes: Iterable[Tuple[Hashable, ROICoordinates, str]]) -> np.ndarray:
+        ''' Returns a copy of the array with the boxes, the copy buffer is reused between frames '''
+        if self._buffer is None or self._buffer.shape != array.shape:
+            self._buffer = np.empty_like(array)
+        np.copyto(self._buffer, array)
+        for _, (start_x, start_y, end_x, end_y), label in boxes:
+            cv2.rectangle(self._buffer, (start_x, start_y), (end_x, end_y),
+                          settings.OVERLAY_LINE_COLOR, settings.LINE_WIDTH)
+            if label:
+                self._draw_label(start_x, start_y, label)
+        return self._buffer
+
+    def _draw_label(self, start_x: int, start_y: int, label: str):
+        (width, height), baseline = cv2.getTextSize(label, self.FONT, self.font_scale, 1)
+        text_x, text_y = start_x + RetainedCanvasDrawer.TEXT_OFFSET, start_y + height + 2
+        if settings.OVERLAY_FONT_BG_COLOR:
+            cv2.rectangle(self._buffer, (text_x - 4, start_y), (text_x + width + 4, text_y + baseline),
+                          settings.OVERLAY_FONT_BG_COLOR, cv2.FILLED)
+        cv2.putText(self._buffer, label, (text_x, text_y), self.FONT, self.font_scale,
+                    settings.OVERLAY_FONT_COLOR, 1, cv2.LINE_AA)
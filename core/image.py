@@ -1,37 +1,175 @@
-from typing import Tuple
+from typing import Tuple, Dict, Union, Hashable
+from itertools import permutations
 
 import numpy as np
-from PIL.Image import Image
+from PIL import Image as image_utils
+from PIL.Image import Image as PILImage
 import cv2
 
+from .metrics import METRICS
+
 ROICoordinates = Tuple[int, int, int, int]
 ScaledROICoordinates = Tuple[float, float, float, float]
+Size = Tuple[int, int]
 
 DEFAULT_COLOR_SPACE = 'RGB'
+CAPTURE_COLOR_SPACE = 'BGR'
+GRAY_COLOR_SPACE = 'GRAY'
+
+# resolved once, the conversions between other color spaces are resolved on first use
+COLOR_CODES: Dict[Tuple[str, str], int] = {
+    (source, target): getattr(cv2, f'COLOR_{source}2{target}')
+    for source, target in permutations([DEFAULT_COLOR_SPACE, CAPTURE_COLOR_SPACE, GRAY_COLOR_SPACE], 2)
+}
+
+
+class Frame:
+    ''' Image backed by a single NumPy buffer, the other color spaces and the
+        resized variants are computed on first use and cached, so every stage
+        asking for them shares a single conversion. Crops are views of the parent buffer.
+    '''
+
+    def __init__(self, array: np.ndarray, color_space: str = CAPTURE_COLOR_SPACE,
+                 parent: "Frame" = None, region: Tuple[slice, slice] = None):
+        self.array = array
+        self.color_space = color_space
+        self._arrays: Dict[str, np.ndarray] = {color_space: array}
+        # (color space, size, interpolation): resized array
+        self._resized: Dict[Hashable, np.ndarray] = {}
+        self._parent = parent
+        self._region = region
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def to_array(self, color_space: str = DEFAULT_COLOR_SPACE) -> np.ndarray:
+        array = self._arrays.get(color_space)
+        if array is None:
+            parent_array = self._parent._arrays.get(color_space) if self._parent else None
+            if parent_array is not None:
+                # the parent frame was already converted, take the view
+                array = parent_array[self._region]
+            else:
+                with METRICS.measure("color_conversion"):
+                    array = cv2.cvtColor(self.array, color_code(self.color_space, color_space))
+            self._arrays[color_space] = array
+        return array
+
+    def resized(self, size: Size, color_space: str = DEFAULT_COLOR_SPACE,
+                interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        ''' The frame resized to (width, height) in the color space '''
+        key = color_space, size, interpolation
+        array = self._resized.get(key)
+        if array is None:
+            if size == self.size:
+                array = self.to_array(color_space)
+            elif self._has_array(color_space):
+                array = self._resize(self.to_array(color_space), size, interpolation)
+            else:
+                # resize the captured buffer, then convert the smaller image
+                array = self.resized(size, self.color_space, interpolation)
+                with METRICS.measure("color_conversion"):
+                    array = cv2.cvtColor(array, color_code(self.color_space, color_space))
+            self._resized[key] = array
+        return array
+
+    def _has_array(self, color_space: str) -> bool:
+        return color_space in self._arrays or (self._parent is not None and color_space in self._parent._arrays)
+
+    @staticmethod
+    def _resize(array: np.ndarray, size: Size, interpolation: int) -> np.ndarray:
+        with METRICS.measure("resize"):
+            return cv2.resize(array, size, interpolation=interpolation)
+
+    def crop(self, coordinates: ROICoordinates) -> "Frame":
+        start_x, start_y, end_x, end_y = (max(0, int(coord)) for coord in coordinates)
+        region = slice(start_y, end_y), slice(start_x, end_x)
+        return Frame(self.array[region], self.color_space, parent=self, region=region)
+
+    def to_pil(self) -> PILImage:
+        return image_utils.fromarray(self.to_array(DEFAULT_COLOR_SPACE))
+
+
+Image = Union[Frame, PILImage]
+
+
+def color_code(source: str, target: str) -> int:
+    code = COLOR_CODES.get((source, target))
+    if code is None:
+        code = COLOR_CODES[source, target] = getattr(cv2, f'COLOR_{source}2{target}')
+    return code
 
 
 def img_to_array(image: Image, color_space: str = DEFAULT_COLOR_SPACE):
+    if isinstance(image, Frame):
+        return image.to_array(color_space)
     array_image = np.array(image)
     if color_space == DEFAULT_COLOR_SPACE:
         return array_image
-    cv2_color_code = getattr(cv2, f'COLOR_{DEFAULT_COLOR_SPACE}2{color_space}')
-    return cv2.cvtColor(array_image, cv2_color_code)
+    return cv2.cvtColor(array_image, color_code(DEFAULT_COLOR_SPACE, color_space))
+
+
+def resize_image(image: Image, size: Size, color_space: str = DEFAULT_COLOR_SPACE,
+                 interpolation: int = cv2.INTER_LINEAR, out: np.ndarray = None) -> np.ndarray:
+    ''' Resized by the frame cache, or into out without caching it '''
+    if isinstance(image, Frame) and out is None:
+        return image.resized(size, color_space, interpolation)
+    return cv2.resize(img_to_array(image, color_space), size, dst=out, interpolation=interpolation)
+
+
+def crop_resize(array: np.ndarray, boxes: np.ndarray, size: Size, out: np.ndarray) -> np.ndarray:
+    ''' Resizes the (N, 4) boxes of the image array straight into out[:N], of shape (N, height, width, 3)
+        and the array dtype, the boxes are clipped to the image
+    '''
+    height, width = array.shape[:2]
+    boxes = np.clip(np.asarray(boxes, dtype="int"), 0, [width - 1, height - 1, width, height])
+    # at least one pixel
+    boxes[:, 2:] = np.maximum(boxes[:, 2:], boxes[:, :2] + 1)
+    with METRICS.measure("resize"):
+        for i, (start_x, start_y, end_x, end_y) in enumerate(boxes):
+            cv2.resize(array[start_y:end_y, start_x:end_x], size, dst=out[i])
+    return out[:len(boxes)]
 
 
 class ROIImage:
+    ''' Region of a parent image, without an image it is cropped on first use.
+        The coordinates are moved by the trackers, the crop is taken from the
+        coordinates given on creation, the ones of the region in the parent image.
+    '''
+
+    __slots__ = ('_image', 'coordinates', 'parent_image', '_crop_coordinates')
 
     def __init__(self, image: Image, coordinates: ROICoordinates,
                  parent_image: Image = None):
-        self.image = image
+        self._image = image
         self.coordinates = coordinates
         self.parent_image = parent_image
+        self._crop_coordinates = coordinates
+
+    @property
+    def image(self) -> Image:
+        if self._image is None and self.parent_image is not None:
+            self._image = self.parent_image.crop(self._crop_coordinates)
+        return self._image
 
 
 class ImageExtractor:
 
     def __init__(self, image: Image):
         self.image = image
-        self.array_image = img_to_array(self.image)
+
+    @property
+    def array_image(self):
+        return img_to_array(self.image)
 
     def extract_from_scale(self, scaled_coordinates: ScaledROICoordinates):
         roi_coordinates = self.scale_roi_coordinates(scaled_coordinates)
@@ -0,0 +1,172 @@
+import time
+import logging
+from typing import Any, Dict, Deque, Optional
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from threading import Lock
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+import numpy as np
+from simple_settings import settings
+
+from .utils.decorators import daemon_threaded
+from .utils.singleton import SingletonMeta
+
+LOG = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Metrics(metaclass=SingletonMeta):
+    ''' Rolling latencies by stage and event counters of the pipeline
+        Usage: with METRICS.measure("ssd_forward"):
+    '''
+
+    def __init__(self, enabled: bool = settings.METRICS_ENABLED, window: int = settings.METRICS_WINDOW):
+        self.enabled = enabled
+        # the reporter threads are running, a fork could copy one of their locks held
+        self.is_reporting = False
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._latency_counts: Dict[str, int] = defaultdict(int)
+        self._latency_totals: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    @contextmanager
+    def measure(self, stage: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, elapsed: float):
+        with self._lock:
+            self._latencies[stage].append(elapsed)
+            self._latency_counts[stage] += 1
+            self._latency_totals[stage] += elapsed
+
+    def increment(self, counter: str, value: int = 1):
+        if self.enabled:
+            with self._lock:
+                self._counters[counter] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        ''' Returns a picklable copy of the metrics, to be merged by another process '''
+        with self._lock:
+            return {
+                "latencies": {stage: list(values) for stage, values in self._latencies.items()},
+                "latency_counts": dict(self._latency_counts),
+                "latency_totals": dict(self._latency_totals),
+                "counters": dict(self._counters),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._latency_counts.clear()
+            self._latency_totals.clear()
+            self._counters.clear()
+
+    def merge(self, snapshot: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            for stage, values in snapshot["latencies"].items():
+                self._latencies[stage].extend(values)
+            for stage, count in snapshot["latency_counts"].items():
+                self._latency_counts[stage] += count
+            for stage, total in snapshot["latency_totals"].items():
+                self._latency_totals[stage] += total
+            for counter, value in snapshot["counters"].items():
+                self._counters[counter] += value
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        ''' Returns the count, total seconds and latency quantiles, in seconds, of every stage '''
+        with self._lock:
+            latencies = {stage: np.array(values) for stage, values in self._latencies.items()}
+            counts = dict(self._latency_counts)
+            totals = dict(self._latency_totals)
+        summary = {}
+        for stage, values in latencies.items():
+            quantiles = np.quantile(values, QUANTILES) if len(values) else [0.0] * len(QUANTILES)
+            summary[stage] = {"count": counts[stage], "total": totals[stage]}
+            summary[stage].update(zip((f"p{int(q * 100)}" for q in QUANTILES), quantiles))
+        return summary
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def log_summary(self):
+        for stage, stats in sorted(self.summary().items()):
+            LOG.info("%-20s count=%d p50=%.2fms p95=%.2fms p99=%.2fms", stage, stats["count"],
+                     stats["p50"] * 1000, stats["p95"] * 1000, stats["p99"] * 1000)
+        counters = " ".join(f"{name}={value}" for name, value in sorted(self.counters.items()))
+        if counters:
+            LOG.info("counters %s", counters)
+
+    def to_prometheus(self) -> str:
+        lines = ["# TYPE cv_stage_latency_seconds summary"]
+        for stage, stats in sorted(self.summary().items()):
+            for quantile in QUANTILES:
+                value = stats[f"p{int(quantile * 100)}"]
+                lines.append(f'cv_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'cv_stage_latency_seconds_sum{{stage="{stage}"}} {stats["total"]:.6f}')
+            lines.append(f'cv_stage_latency_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines.append("# TYPE cv_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'cv_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.to_prometheus().encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        LOG.debug(format, *args)
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@daemon_threaded
+def log_periodically(interval: float):
+    while True:
+        time.sleep(interval)
+        METRICS.log_summary()
+
+
+@daemon_threaded
+def serve_metrics(host: str, port: int):
+    LOG.info("serving metrics at http://%s:%d/metrics", host, port)
+    MetricsServer((host, port), MetricsRequestHandler).serve_forever()
+
+
+def start_reporting(log_interval: float = settings.METRICS_LOG_INTERVAL,
+                    host: str = settings.METRICS_HOST, port: Optional[int] = settings.METRICS_PORT):
+    if not METRICS.enabled:
+        return
+    if log_interval:
+        log_periodically(log_interval)
+        METRICS.is_reporting = True
+    if port:
+        serve_metrics(host, port)
+        METRICS.is_reporting = True
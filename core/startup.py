@@ -0,0 +1,16 @@
+''' Time spent starting the application, by stage. Imported first by the entry points,
+    so its stopwatch starts with the process.
+'''
+import logging
+
+from .utils.stopwatch import Stopwatch
+
+LOG = logging.getLogger(__name__)
+
+STARTUP = Stopwatch()
+
+
+def log_startup_report(stopwatch: Stopwatch = STARTUP):
+    LOG.info("started in %.2fs", stopwatch.elapsed)
+    for stage, total in stopwatch.totals.items():
+        LOG.info("startup stage %-16s %.2fs", stage, total)
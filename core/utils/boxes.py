@@ -0,0 +1,52 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def box_area(boxes: np.ndarray) -> np.ndarray:
+    ''' Areas of (N, 4) boxes in (start_x, start_y, end_x, end_y) format '''
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    ''' Intersection over union of every pair of boxes, shape (N, M) '''
+    boxes_a = np.asarray(boxes_a, dtype="float")
+    boxes_b = np.asarray(boxes_b, dtype="float")
+    start = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    end = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(end - start, 0, None), axis=2)
+    union = box_area(boxes_a)[:, None] + box_area(boxes_b)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> np.ndarray:
+    ''' Indices of the boxes kept, by decreasing score, a box is dropped when its
+        IoU with a kept box with a higher score exceeds the threshold
+    '''
+    if not len(boxes):
+        return np.empty(0, dtype="int")
+    order = np.argsort(scores)[::-1]
+    iou = box_iou(boxes[order], boxes[order])
+    suppressed = np.zeros(len(order), dtype="bool")
+    for i in range(len(order)):
+        if not suppressed[i]:
+            suppressed[i + 1:] |= iou[i, i + 1:] > threshold
+    return order[~suppressed]
+
+
+def tile_boxes(width: int, height: int, grid: Tuple[int, int], overlap: float,
+               full_frame: bool = False) -> np.ndarray:
+    ''' Grid of (columns, rows) tiles covering the frame, consecutive tiles overlap
+        by a fraction of their size. With full_frame, the first box is the whole frame.
+    '''
+    columns, rows = grid
+    tile_width = width / (columns - (columns - 1) * overlap)
+    tile_height = height / (rows - (rows - 1) * overlap)
+    start_x = np.arange(columns) * tile_width * (1 - overlap)
+    start_y = np.arange(rows) * tile_height * (1 - overlap)
+    start_x, start_y = (array.ravel() for array in np.meshgrid(start_x, start_y))
+    boxes = np.stack([start_x, start_y, start_x + tile_width, start_y + tile_height], axis=1)
+    boxes = np.minimum(np.round(boxes), [width, height, width, height]).astype("int")
+    if full_frame:
+        boxes = np.vstack([[0, 0, width, height], boxes])
+    return boxes
@@ -9,3 +9,13 @@ def threaded(func):
         thread.start()
         return thread
     return wrapper
+
+
+def daemon_threaded(func):
+    ''' Like threaded, but the thread does not keep the process alive '''
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Thread:
+        thread = Thread(target=func, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+    return wrapper
@@ -1,8 +1,13 @@
+import os
+import time
 import logging
-from typing import Dict, Hashable, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock
+from typing import Dict, Hashable, Any, Callable, Iterable, List, Optional, Tuple
 
 import cv2
-from tensorflow.keras.models import load_model
+from simple_settings import settings
 
 from .singleton import SingletonMeta
 
@@ -10,23 +15,171 @@ from .singleton import SingletonMeta
 LOG = logging.getLogger(__name__)
 
 
+def file_size(path: str) -> int:
+    ''' Bytes of a model file or directory (SavedModel), an estimate of its memory '''
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
 class ModelLoader(metaclass=SingletonMeta):
+    ''' Loads every model once, the runtimes are imported by the loaders using them.
+        The loads are thread safe, a model is loaded by a single thread while the others wait for it.
+        With max_bytes, the least recently used models are evicted when the size of their files
+        exceeds it. An evicted model is freed once no one else holds it: the LazyModel attributes
+        drop it on its eviction and load it again on their next access. The models read through
+        a LazyModel are not looked up on every access, their recency is the one of their load.
+    '''
 
-    _models: Dict[Hashable, Any] = dict()
+    def __init__(self, max_bytes: Optional[int] = settings.MODEL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # key: (model, bytes), in least recently used order
+        self._models: Dict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._key_locks: Dict[Hashable, Lock] = dict()
+        # key: callbacks run once the model is evicted
+        self._eviction_callbacks: Dict[Hashable, List[Callable[[], None]]] = dict()
+        self._lock = Lock()
 
     def from_keras(self, path):
-        model = self._models.get(path)
-        if not model:
+        def load():
+            from tensorflow.keras.models import load_model
             LOG.info("Loading keras model: %s", path)
-            model = load_model(path)
-            self._models[path] = model
-        return model
+            return load_model(path)
+        return self._get(('keras', path), load, [path])
 
     def from_cafe(self, prototxt_path, caffemodel_path):
         path = prototxt_path, caffemodel_path
-        model = self._models.get(path)
-        if not model:
+
+        def load():
             LOG.info("Loading caffe model: %s", path)
-            model = cv2.dnn.readNetFromCaffe(*path)
-            self._models[path] = model
+            return cv2.dnn.readNetFromCaffe(*path)
+        return self._get(('caffe', path), load, path)
+
+    def from_backend(self, backend: str, path: str):
+        ''' Inference backend, cached as a whole as it owns its runtime model '''
+        def load():
+            from core.computer_vision.recognition.backends import create_backend
+            LOG.info("Loading %s backend: %s", backend, path)
+            return create_backend(backend, path)
+        return self._get(('backend', backend, path), load, [path])
+
+    def preload(self, *loaders: Callable[[], Any], workers: int = 2) -> List[Future]:
+        ''' Loads models in the background
+            Usage: loader.preload(lambda: loader.from_keras(path), FaceDetection.MODEL.load)
+        '''
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="preload")
+        futures = [executor.submit(loader) for loader in loaders]
+        # the threads exit once the loads are done
+        executor.shutdown(wait=False)
+        return futures
+
+    def is_loaded(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._models
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def on_evict(self, model: Any, callback: Callable[[], None]) -> bool:
+        ''' Runs the callback once the model is evicted, returns False when the model is not cached '''
+        with self._lock:
+            for key, (cached_model, _) in self._models.items():
+                if cached_model is model:
+                    self._eviction_callbacks.setdefault(key, []).append(callback)
+                    return True
+        return False
+
+    def evict(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._models):
+                self._remove(key)
+
+    def _get(self, key: Hashable, load: Callable[[], Any], paths: Iterable[str]) -> Any:
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, Lock())
+        with key_lock:
+            with self._lock:
+                # loaded by another thread while waiting
+                if key in self._models:
+                    return self._models[key][0]
+            model = load()
+            size = sum(file_size(path) for path in paths)
+            with self._lock:
+                self._models[key] = model, size
+                self._evict(keep=key)
         return model
+
+    def _evict(self, keep: Hashable):
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size in self._models.values())
+        for key in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._models[key][1]
+            self._remove(key)
+            LOG.info("Evicted model: %s", key)
+
+    def _remove(self, key: Hashable):
+        ''' Called with the lock held '''
+        self._models.pop(key, None)
+        self._key_locks.pop(key, None)
+        for callback in self._eviction_callbacks.pop(key, []):
+            callback()
+
+
+class LazyModel:
+    ''' Class attribute loaded on its first access, by any thread.
+        The loader must return a model cached by the ModelLoader, it is held until the
+        ModelLoader evicts it, then it is loaded again through the loader on the next access.
+        Usage: MODEL = LazyModel(lambda: ModelLoader().from_cafe(*paths))
+    '''
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self._model = None
+        self._is_loaded = False
+        self._lock = Lock()
+
+    def __set_name__(self, owner, name):
+        self.name = f"{owner.__name__}.{name}"
+
+    def __get__(self, instance, owner):
+        return self.load()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._model
+            if model is not None:
+                return model
+            start = time.perf_counter()
+            model = self.loader()
+            if not self._is_loaded:
+                self._is_loaded = True
+                LOG.info("%s loaded in %.2fs", self.name, time.perf_counter() - start)
+            # not held when it was evicted, or not cached, meanwhile
+            if ModelLoader().on_evict(model, self._release):
+                self._model = model
+        return model
+
+    def _release(self):
+        self._model = None
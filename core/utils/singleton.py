@@ -1,3 +1,4 @@
+from threading import RLock
 from typing import Optional
 
 
@@ -6,8 +7,12 @@ class SingletonMeta(type):
         Usage: class Sample(metaclass=SingletonMeta):
     '''
     _instance: Optional = None
+    # reentrant, a singleton may create another one while it is initialized
+    _lock = RLock()
 
     def __call__(self):
         if self._instance is None:
-            self._instance = super().__call__()
+            with self._lock:
+                if self._instance is None:
+                    self._instance = super().__call__()
         return self._instance
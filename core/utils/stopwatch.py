@@ -0,0 +1,45 @@
+from typing import Dict
+from collections import defaultdict
+from contextlib import contextmanager
+import time
+
+
+class Stopwatch:
+    ''' Accumulates the elapsed time of named stages
+        Usage: with stopwatch.measure("detection"):
+    '''
+
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, elapsed: float, count: int = 1):
+        self.totals[stage] += elapsed
+        self.counts[stage] += count
+
+    def merge(self, other: "Stopwatch"):
+        for stage, elapsed in other.totals.items():
+            self.add(stage, elapsed, other.counts[stage])
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "count": self.counts[stage],
+                "total_s": total,
+                "mean_ms": total / self.counts[stage] * 1000,
+            }
+            for stage, total in self.totals.items()
+        }
@@ -1 +1,2 @@
-from .streamer import VideoStreamer
+from .buffer import FrameBuffer
+from .streamer import VideoStreamer, ThreadedVideoStreamer, ImageDirectoryStreamer
@@ -0,0 +1,79 @@
+from typing import Any, Optional, Iterable
+from collections import deque
+from threading import Condition
+
+DROP_OLDEST = 'oldest'
+DROP_NEWEST = 'newest'
+
+
+class FrameBuffer:
+    ''' Bounded and thread safe frame queue.
+        When it is full, the oldest frame is discarded for the 'oldest' drop policy,
+        otherwise the incoming frame is discarded.
+    '''
+
+    def __init__(self, maxsize: int = 8, drop_policy: str = DROP_OLDEST):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.dropped_count = 0
+        self.delivered_count = 0
+        self._frames = deque()
+        self._condition = Condition()
+        self._closed = False
+
+    def put(self, frame: Any) -> bool:
+        with self._condition:
+            if len(self._frames) >= self.maxsize:
+                self.dropped_count += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                self._frames.popleft()
+            self._frames.append(frame)
+            self._condition.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        ''' Returns the oldest frame, waiting for one if the buffer is empty.
+            Returns None on timeout or when the buffer was closed and drained.
+        '''
+        with self._condition:
+            if not self._condition.wait_for(self._is_readable, timeout):
+                return None
+            if not self._frames:
+                return None
+            self.delivered_count += 1
+            return self._frames.popleft()
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[Any]:
+        ''' Returns the newest frame, the older ones are counted as dropped '''
+        with self._condition:
+            if not self._condition.wait_for(self._is_readable, timeout):
+                return None
+            if not self._frames:
+                return None
+            frame = self._frames.pop()
+            self.dropped_count += len(self._frames)
+            self._frames.clear()
+            self.delivered_count += 1
+            return frame
+
+    def frames(self, timeout: Optional[float] = None) -> Iterable[Any]:
+        ''' Iterates the frames in capture order until the buffer is closed '''
+        while True:
+            frame = self.get(timeout)
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def _is_readable(self) -> bool:
+        return bool(self._frames) or self._closed
@@ -1,20 +1,26 @@
 import logging
-from typing import Iterable
+from typing import Iterable, Optional
 
+from imutils import paths
 from imutils.video import FPS
 import cv2
-from PIL import Image as image_utils
+from simple_settings import settings
 
-from ..image import Image
+from ..image import Image, Frame, CAPTURE_COLOR_SPACE
+from ..metrics import METRICS
+from ..utils.decorators import daemon_threaded
+from .buffer import FrameBuffer
 
 LOG = logging.getLogger(__name__)
 
 
 class VideoStreamer:
 
-    def __init__(self, source=0, window_title="Frame"):
+    def __init__(self, source=0, window_title="Frame", start_frame: int = 0):
         self.window_title = window_title
         self.video_stream = cv2.VideoCapture(source)
+        if start_frame:
+            self.video_stream.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
         self.frame_count = 0
         self._current_frame = None
         self._is_streaming = False
@@ -30,24 +36,123 @@ class VideoStreamer:
 
     def stop(self):
         self._is_streaming = False
-        self.video_stream.stop()
+        self.video_stream.release()
         self.fps.stop()
         LOG.info("streamer elapsed time: %.2f", self.fps.elapsed())
         LOG.info("streamer FPS: %.2f", self.fps.fps())
 
     def read_frame(self) -> Image:
-        _, self._current_frame = self.video_stream.read()
-        array_frame = cv2.cvtColor(self._current_frame, cv2.COLOR_BGR2RGB)
+        frame = self._capture_frame()
         self._update_fps()
-        return image_utils.fromarray(array_frame)
+        return frame
 
     def display_frame(self):
         cv2.imshow(self.window_title, self._current_frame)
 
+    def _capture_frame(self) -> Optional[Image]:
+        with METRICS.measure("capture"):
+            grabbed, self._current_frame = self.video_stream.read()
+        if not grabbed:
+            return None
+        METRICS.increment("frames_captured")
+        # keep the captured buffer, the color conversions are done on demand
+        return Frame(self._current_frame, CAPTURE_COLOR_SPACE)
+
     def _update_fps(self):
         self.frame_count += 1
         self.fps.update()
 
+    @property
+    def total_frames(self) -> int:
+        ''' Frame quantity of a video file, it is not available for live sources '''
+        return int(self.video_stream.get(cv2.CAP_PROP_FRAME_COUNT))
+
     @property
     def engine(self):
         return cv2
+
+
+class ImageDirectoryStreamer:
+    ''' Streams the images of a directory, sorted by path, as video frames '''
+
+    def __init__(self, directory: str):
+        self.image_paths = sorted(paths.list_images(directory))
+        self.frame_count = 0
+        self.fps = FPS().start()
+        self._path_index = 0
+
+    def stop(self):
+        self.fps.stop()
+        LOG.info("streamer elapsed time: %.2f", self.fps.elapsed())
+        LOG.info("streamer FPS: %.2f", self.fps.fps())
+
+    def read_frame(self) -> Optional[Image]:
+        while self._path_index < len(self.image_paths):
+            path = self.image_paths[self._path_index]
+            self._path_index += 1
+            image = cv2.imread(path)
+            if image is None:
+                LOG.warning("skipping unreadable image: %s", path)
+                continue
+            self.frame_count += 1
+            self.fps.update()
+            return Frame(image, CAPTURE_COLOR_SPACE)
+        return None
+
+
+class ThreadedVideoStreamer(VideoStreamer):
+    ''' Captures the frames in a background thread into a bounded FrameBuffer,
+        so the camera I/O and the color conversion do not block the consumer.
+    '''
+
+    def __init__(self, source=0, window_title="Frame",
+                 buffer_size: int = settings.FRAME_BUFFER_SIZE,
+                 drop_policy: str = settings.FRAME_DROP_POLICY,
+                 read_timeout: Optional[float] = settings.FRAME_READ_TIMEOUT):
+        super().__init__(source, window_title)
+        self.buffer = FrameBuffer(buffer_size, drop_policy)
+        self.read_timeout = read_timeout
+        self._is_capturing = True
+        self._capture_thread = self._capture()
+
+    def stop(self):
+        self._is_capturing = False
+        self._capture_thread.join()
+        super().stop()
+        LOG.info("streamer dropped frames: %d", self.dropped_count)
+
+    def read_frame(self) -> Optional[Image]:
+        ''' Returns the next frame in capture order '''
+        return self._deliver(self.buffer.get(self.read_timeout))
+
+    def latest_frame(self) -> Optional[Image]:
+        ''' Returns the most recent frame, skipping the pending ones '''
+        return self._deliver(self.buffer.latest(self.read_timeout))
+
+    def frames(self) -> Iterable[Image]:
+        for frame in self.buffer.frames(self.read_timeout):
+            self._update_fps()
+            yield frame
+
+    @property
+    def dropped_count(self) -> int:
+        return self.buffer.dropped_count
+
+    @property
+    def delivered_count(self) -> int:
+        return self.buffer.delivered_count
+
+    def _deliver(self, frame: Optional[Image]) -> Optional[Image]:
+        if frame is not None:
+            self._update_fps()
+        return frame
+
+    @daemon_threaded
+    def _capture(self):
+        while self._is_capturing:
+            frame = self._capture_frame()
+            if frame is None:
+                LOG.info("video source exhausted after %d frames", self.delivered_count)
+                break
+            self.buffer.put(frame)
+        self.buffer.close()
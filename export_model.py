@@ -0,0 +1,33 @@
+import argparse
+import logging.config
+
+from simple_settings import settings
+
+from core.utils.model_loader import ModelLoader
+from core.computer_vision.recognition.classification.export import EXPORTERS, ONNX_FORMAT, TFLITE_FORMAT
+
+logging.config.dictConfig(settings.LOGGING)
+
+OUTPUT_PATHS = {
+    ONNX_FORMAT: settings.MASK_DETECTOR_MODEL_ONNX,
+    TFLITE_FORMAT: settings.MASK_DETECTOR_MODEL_TFLITE,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Exports the keras mask classifier for the opencv, onnxruntime and tflite backends")
+    parser.add_argument("--formats", nargs="+", choices=sorted(EXPORTERS), default=sorted(EXPORTERS))
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    model = ModelLoader().from_keras(settings.MASK_DETECTOR_MODEL)
+    for export_format in args.formats:
+        EXPORTERS[export_format](model, OUTPUT_PATHS[export_format])
+
+
+if __name__ == '__main__':
+    main()
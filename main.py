@@ -1,13 +1,18 @@
+from core.startup import STARTUP  # first import, its stopwatch times the startup
 import logging.config
 from simple_settings import settings
 
 from core.app import GUIApp
+from core.metrics import start_reporting
 from apps.face_mask.controllers import FaceMaskRecognition
 
 logging.config.dictConfig(settings.LOGGING)
+STARTUP.add("imports", STARTUP.elapsed)
 
 
 if __name__ == '__main__':
-    with GUIApp():
+    start_reporting()
+    with GUIApp() as app:
         client = FaceMaskRecognition()
+        app.on_stop(client.close)
         client.open_window()
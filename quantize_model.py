@@ -0,0 +1,59 @@
+import json
+import argparse
+import logging.config
+
+from simple_settings import settings
+
+from core.computer_vision.recognition.backends import KerasBackend, TFLiteBackend
+from core.computer_vision.recognition.classification.export import export_tflite, QUANTIZATIONS
+from core.computer_vision.recognition.classification.evaluation import load_dataset, evaluate
+from apps.face_mask.services.mask import MaskClassifier
+
+logging.config.dictConfig(settings.LOGGING)
+LOG = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Quantizes the keras mask classifier to tflite and reports the accuracy and latency of every model")
+    parser.add_argument("--quantizations", nargs="+", choices=QUANTIZATIONS, default=QUANTIZATIONS)
+    parser.add_argument("--dataset", default=settings.QUANTIZATION_DATASET)
+    parser.add_argument("--calibration-size", type=int, default=settings.QUANTIZATION_CALIBRATION_SIZE)
+    parser.add_argument("--evaluation-size", type=int, default=settings.QUANTIZATION_EVALUATION_SIZE)
+    parser.add_argument("--output", help="report file, by default printed")
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    images, labels = load_dataset(args.dataset, settings.QUANTIZATION_CLASS_DIRS,
+                                  limit=args.calibration_size + args.evaluation_size)
+    # the calibration images are left out of the evaluation
+    calibration_images, images, labels = \
+        images[:args.calibration_size], images[args.calibration_size:], labels[args.calibration_size:]
+    LOG.info("calibration images: %d, evaluation images: %d", len(calibration_images), len(images))
+
+    reference = MaskClassifier(backend=KerasBackend(settings.MASK_DETECTOR_MODEL))
+    keras_model = reference.backend.model
+    calibration = reference.transform_images(calibration_images)
+    report = {}
+    report["float32"], reference_labels = evaluate(reference, images, labels)
+    for quantization in args.quantizations:
+        path = settings.MASK_DETECTOR_MODEL_QUANTIZED.format(quantization)
+        export_tflite(keras_model, path, quantization, calibration)
+        classifier = MaskClassifier(backend=TFLiteBackend(path))
+        report[quantization], _ = evaluate(classifier, images, labels, reference_labels)
+
+    for model, stats in report.items():
+        LOG.info("%-8s accuracy=%.4f agreement=%.4f latency=%.2fms", model,
+                 stats["accuracy"], stats.get("agreement", 1.0), stats["latency_ms"])
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
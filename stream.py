@@ -0,0 +1,46 @@
+import os
+import argparse
+import logging.config
+from contextlib import ExitStack
+
+from simple_settings import settings
+
+from core.metrics import start_reporting
+from apps.face_mask.multistream import MultiStreamRecognition
+from apps.face_mask.services.output import WRITERS
+
+logging.config.dictConfig(settings.LOGGING)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Headless face mask recognition serving many cameras with shared models")
+    parser.add_argument("sources", nargs="*", help="camera indexes or stream URLs, by default VIDEO_SOURCES")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--settings", help="settings module, e.g. conf.settings")
+    return parser.parse_args()
+
+
+def parse_source(source: str):
+    return int(source) if source.isdigit() else source
+
+
+def main():
+    args = parse_args()
+    start_reporting()
+    sources = [parse_source(source) for source in args.sources] or settings.VIDEO_SOURCES
+    with ExitStack() as stack:
+        writers = [
+            stack.enter_context(WRITERS[args.format](
+                os.path.join(settings.OUTPUT_PATH, f"camera_{i}.{args.format}")))
+            for i in range(len(sources))
+        ]
+        recognition = MultiStreamRecognition(sources, writers)
+        try:
+            recognition.run()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()